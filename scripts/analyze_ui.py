@@ -24,19 +24,68 @@ Usage:
 """
 
 import base64
+import fnmatch
+import functools
+import hashlib
+import heapq
+import io
 import json
+import mmap
 import os
+import re
 import sys
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Sequence
 import subprocess
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
 except ImportError:
     print("Error: requests module not found. Install with: pip3 install requests")
     sys.exit(1)
 
+# orjson is optional; it encodes and decodes large payloads much faster
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Pillow is optional; callers asking for a max edge get downscaled uploads with it
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+def json_dump(obj, path: Path, indent: bool = False):
+    """Write obj as JSON to path.
+
+    orjson serializes to one bytes buffer in C; the stdlib fallback streams
+    the encoder's chunks into the file so the whole document is never held
+    as one str.
+    """
+    if orjson is not None:
+        path.write_bytes(json_dumps(obj, indent))
+        return
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2 if indent else None)
+
+def json_loads(data):
+    """Parse JSON from str or bytes, via orjson when available.
+
+    Both parsers raise a json.JSONDecodeError subclass on bad input.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # VLM Service Configuration
 # Supports both DNS names (talkie-vlm.local) and IP addresses (127.0.0.1)
 # Run ./scripts/setup-vlm-dns.sh to configure local DNS
@@ -47,6 +96,15 @@ VLM_BASE_URL = os.environ.get("VLM_URL", f"http://{VLM_HOST}:{VLM_PORT}")
 VLM_URL = f"{VLM_BASE_URL}/v1/chat/completions"
 VLM_HEALTH_URL = f"{VLM_BASE_URL}/health"
 
+# One keep-alive session for health pings and completions, so a
+# talkie-vlm.local (mDNS) lookup and TCP handshake happen once per run.
+# The pool is sized for callers that analyze several images concurrently.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=8))
+
+# Set once the service has answered a health check
+_vlm_healthy = False
+
 DEFAULT_PROMPT = """Analyze this screenshot of a macOS app in light mode and identify any visual issues.
 
 Focus on:
@@ -76,10 +134,46 @@ Format your response as JSON:
 }
 """
 
-def encode_image_to_data_url(image_path: Path) -> str:
-    """Encode an image file to a base64 data URL."""
-    with open(image_path, "rb") as f:
-        image_data = f.read()
+# VLM results cached by screenshot content + prompt, shared across audit runs
+VLM_CACHE_DIR = Path.home() / ".cache" / "talkie-audit" / "vlm"
+VLM_CACHE_MAX_ENTRIES = 500
+
+# Concurrent VLM requests for the batch scripts; inference is server-bound,
+# so a few in flight keep the model busy without queueing a whole audit on it
+DEFAULT_JOBS = 4
+
+# Report rules
+BAR = "=" * 80
+DASH = "-" * 80
+
+# mlx-vlm can hand back the repr of its GenerationResult instead of the text
+_GENERATION_RESULT_RE = re.compile(r"GenerationResult\(text='(.*?)', token=", re.DOTALL)
+_REPR_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+_REPR_ESCAPES = {"n": "\n", "t": "\t", '"': '"', "'": "'", "\\": "\\"}
+
+def _unescape_repr(m: re.Match) -> str:
+    return _REPR_ESCAPES.get(m.group(1), m.group(0))
+
+def encode_image_to_data_url(image_path: Path, max_edge: Optional[int] = None,
+                             data: Optional[bytes] = None) -> str:
+    """Encode an image file to a base64 data URL.
+
+    With max_edge set and Pillow installed, an image whose longer side
+    exceeds it is first shrunk to fit (Lanczos) and sent as PNG; Retina
+    captures otherwise cost the VLM several times the vision tokens.
+    A caller that already holds the file contents passes them as data, and
+    the file is not read again (image_path still decides the MIME type).
+    """
+    if max_edge and Image is not None:
+        try:
+            with Image.open(image_path if data is None else io.BytesIO(data)) as img:
+                if max(img.size) > max_edge:
+                    img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+                    buf = io.BytesIO()
+                    img.save(buf, format="PNG")
+                    return "data:image/png;base64," + base64.b64encode(buf.getbuffer()).decode('ascii')
+        except OSError:
+            pass  # Not something Pillow can read; send the file as-is
 
     # Detect image format from extension
     ext = image_path.suffix.lower()
@@ -91,35 +185,31 @@ def encode_image_to_data_url(image_path: Path) -> str:
         ".webp": "image/webp"
     }.get(ext, "image/png")
 
-    b64_data = base64.b64encode(image_data).decode('utf-8')
-    return f"data:{mime_type};base64,{b64_data}"
-
-def check_vlm_health() -> bool:
-    """Check if VLM service is running."""
-    try:
-        response = requests.get(VLM_HEALTH_URL, timeout=2)
-        return response.status_code == 200
-    except requests.exceptions.RequestException:
-        return False
+    if data is not None:
+        return "data:" + mime_type + ";base64," + base64.b64encode(data).decode('ascii')
 
-def analyze_image_with_vlm(image_path: Path, prompt: str) -> dict:
-    """Send an image to VLM for analysis."""
-    if not check_vlm_health():
-        print("❌ VLM service is not running!")
-        print("\nStart it with:")
-        print("  cd ~/dev/agentloop")
-        print("  bun run vlm:server")
-        print("\nOr run the setup script:")
-        print("  ./scripts/setup-vlm-analysis.sh")
-        sys.exit(1)
+    # Encode straight from a memory map so the raw image never becomes
+    # its own bytes object (Retina screenshots run to several MB). An empty
+    # file can't be mapped; it goes out as an empty payload for the VLM to reject
+    with open(image_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            b64_data = base64.b64encode(f.read()).decode('ascii')
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                b64_data = base64.b64encode(mm).decode('ascii')
+    return "data:" + mime_type + ";base64," + b64_data
 
-    print(f"🔍 Analyzing {image_path.name}...")
-    print(f"📝 Prompt: {prompt[:100]}..." if len(prompt) > 100 else f"📝 Prompt: {prompt}")
+# Stands in for the image data URL while the request envelope is serialized
+_IMAGE_URL_PLACEHOLDER = "__talkie_vlm_image_url__"
 
-    # Encode image
-    data_url = encode_image_to_data_url(image_path)
+def build_request_body(image_path: Path, prompt: str, max_edge: Optional[int] = None,
+                       data: Optional[bytes] = None) -> bytes:
+    """Serialize the chat completion request for an image as JSON bytes.
 
-    # Prepare request
+    The envelope is serialized without the image, then the data URL is
+    spliced in as bytes. Base64 needs no JSON escaping, so this skips
+    re-scanning megabytes of image data inside the encoder.
+    """
     payload = {
         "model": "mlx-community/Qwen2-VL-2B-Instruct-4bit",
         "messages": [
@@ -133,7 +223,7 @@ def analyze_image_with_vlm(image_path: Path, prompt: str) -> dict:
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": data_url
+                            "url": _IMAGE_URL_PLACEHOLDER
                         }
                     }
                 ]
@@ -143,12 +233,58 @@ def analyze_image_with_vlm(image_path: Path, prompt: str) -> dict:
         "temperature": 0.1  # Low temperature for consistent analysis
     }
 
+    # rsplit: the image part is serialized after the prompt text
+    envelope = json_dumps(payload)
+    head, tail = envelope.rsplit(_IMAGE_URL_PLACEHOLDER.encode("ascii"), 1)
+    return b"".join((head, encode_image_to_data_url(image_path, max_edge, data).encode("ascii"), tail))
+
+def check_vlm_health(force: bool = False) -> bool:
+    """Check if VLM service is running. A healthy result is cached for the run.
+
+    force probes the service even after a cached success. A failed forced
+    probe doesn't clear the cache, so analyze_image_with_vlm calls already
+    under way fail on their own request rather than exiting the process.
+    """
+    global _vlm_healthy
+    if _vlm_healthy and not force:
+        return True
+    try:
+        response = SESSION.get(VLM_HEALTH_URL, timeout=2)
+    except requests.exceptions.RequestException:
+        return False
+    healthy = response.status_code == 200
+    _vlm_healthy = _vlm_healthy or healthy
+    return healthy
+
+def analyze_image_with_vlm(image_path: Path, prompt: str, max_edge: Optional[int] = None,
+                           data: Optional[bytes] = None) -> dict:
+    """Send an image to VLM for analysis, optionally downscaled to max_edge.
+
+    data is the file's contents when the caller has already read them.
+    """
+    if not check_vlm_health():
+        print("❌ VLM service is not running!")
+        print("\nStart it with:")
+        print("  cd ~/dev/agentloop")
+        print("  bun run vlm:server")
+        print("\nOr run the setup script:")
+        print("  ./scripts/setup-vlm-analysis.sh")
+        sys.exit(1)
+
+    print(f"🔍 Analyzing {image_path.name}...")
+    print(f"📝 Prompt: {prompt[:100]}..." if len(prompt) > 100 else f"📝 Prompt: {prompt}")
+
     # Send request
     try:
-        response = requests.post(VLM_URL, json=payload, timeout=90)
+        response = SESSION.post(
+            VLM_URL,
+            data=build_request_body(image_path, prompt, max_edge, data),
+            headers={"Content-Type": "application/json"},
+            timeout=90
+        )
         response.raise_for_status()
 
-        result = response.json()
+        result = json_loads(response.content)
         content = result["choices"][0]["message"]["content"]
 
         return {
@@ -156,7 +292,7 @@ def analyze_image_with_vlm(image_path: Path, prompt: str) -> dict:
             "analysis": content,
             "raw_response": result
         }
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
         error_details = str(e)
         try:
             # Try to extract error details from response body
@@ -171,6 +307,59 @@ def analyze_image_with_vlm(image_path: Path, prompt: str) -> dict:
             "error": error_details
         }
 
+@functools.lru_cache(maxsize=8)
+def _prompt_digest(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+def vlm_cache_key(screenshot: Path, prompt: str, max_edge: Optional[int] = None,
+                  data: Optional[bytes] = None) -> str:
+    """Cache key for a screenshot + prompt pair.
+
+    A max_edge that actually gets applied (Pillow installed) changes what the
+    VLM sees, so it is part of the key; full-size keys are unchanged. data
+    is the screenshot's contents if already read.
+    """
+    if data is None:
+        data = screenshot.read_bytes()
+    image_hash = hashlib.sha256(data).hexdigest()
+    key = f"{image_hash}-{_prompt_digest(prompt)}"
+    if max_edge and Image is not None:
+        key += f"-e{max_edge}"
+    return key
+
+def load_cached_vlm_result(key: str) -> Optional[dict]:
+    """Return a cached VLM result, or None on a miss."""
+    path = VLM_CACHE_DIR / f"{key}.json"
+    try:
+        result = json.loads(path.read_text(encoding="utf-8"))
+        os.utime(path)  # Keep recently used entries from being evicted
+    except (OSError, ValueError):
+        return None
+    return result
+
+def store_cached_vlm_result(key: str, result: dict):
+    """Atomically cache a successful VLM result."""
+    if not result["success"]:
+        return
+    entry = {"success": True, "analysis": result["analysis"]}
+    try:
+        VLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=VLM_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, VLM_CACHE_DIR / f"{key}.json")
+    except OSError as e:
+        print(f"   ⚠️  Could not cache result: {e}")
+
+def evict_vlm_cache(max_entries: int = VLM_CACHE_MAX_ENTRIES):
+    """Drop the least recently used cache entries beyond max_entries."""
+    try:
+        entries = sorted(VLM_CACHE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    except OSError:
+        return
+    for path in entries[max_entries:]:
+        path.unlink(missing_ok=True)
+
 def capture_screenshot(output_path: Path) -> bool:
     """Capture a screenshot using macOS screencapture."""
     print(f"📸 Capturing screenshot to {output_path}...")
@@ -187,44 +376,51 @@ def capture_screenshot(output_path: Path) -> bool:
 
 def parse_json_from_response(analysis: str) -> Optional[dict]:
     """Try to extract JSON from the VLM response."""
-    # Handle GenerationResult wrapper: GenerationResult(text='...', ...)
-    if analysis.startswith("GenerationResult(text="):
+    # Sniff the first character so only plausible parses are attempted;
+    # raising and catching JSONDecodeError on plain-text replies is the slow path
+    head = analysis.lstrip()[:1]
+
+    # Bare JSON
+    if head == "{" or head == "[":
         try:
-            # Extract the text value from GenerationResult
-            start = analysis.find("text='") + 6
-            end = analysis.find("', token=")
-            if start > 5 and end > start:
-                json_str = analysis[start:end]
-                # Unescape the string
-                json_str = json_str.replace('\\"', '"').replace('\\n', '\n')
-                return json.loads(json_str)
-        except (ValueError, json.JSONDecodeError):
+            return json_loads(analysis)
+        except json.JSONDecodeError:
             pass
 
+    # Handle GenerationResult wrapper: GenerationResult(text='...', ...)
+    elif head == "G":
+        match = _GENERATION_RESULT_RE.match(analysis)
+        if match:
+            # Unescape the repr'd string in one pass
+            json_str = _REPR_ESCAPE_RE.sub(_unescape_repr, match.group(1))
+            try:
+                return json_loads(json_str)
+            except json.JSONDecodeError:
+                pass
+
     # Look for JSON code block
-    if "```json" in analysis:
-        start = analysis.find("```json") + 7
+    start = analysis.find("```json")
+    if start >= 0:
+        start += 7
         end = analysis.find("```", start)
         if end > start:
             json_str = analysis[start:end].strip()
             try:
-                return json.loads(json_str)
+                return json_loads(json_str)
             except json.JSONDecodeError:
                 pass
 
-    # Try direct JSON parsing
-    try:
-        return json.loads(analysis)
-    except json.JSONDecodeError:
-        return None
+    return None
 
 def format_analysis_report(analysis_text: str, screenshot_name: str, prompt: str) -> str:
     """Format the VLM analysis into a readable report."""
-    report = f"\n{'='*80}\n"
-    report += f"UI Analysis: {screenshot_name}\n"
-    report += f"{'='*80}\n\n"
-    report += f"Prompt: {prompt[:200]}...\n" if len(prompt) > 200 else f"Prompt: {prompt}\n"
-    report += "-" * 80 + "\n\n"
+    parts = [
+        f"\n{BAR}\n",
+        f"UI Analysis: {screenshot_name}\n",
+        f"{BAR}\n\n",
+        f"Prompt: {prompt[:200]}...\n" if len(prompt) > 200 else f"Prompt: {prompt}\n",
+        f"{DASH}\n\n",
+    ]
 
     # Try to parse as JSON
     parsed = parse_json_from_response(analysis_text)
@@ -232,25 +428,77 @@ def format_analysis_report(analysis_text: str, screenshot_name: str, prompt: str
     if parsed and "issues" in parsed:
         issues = parsed["issues"]
         if issues:
-            report += f"Found {len(issues)} issue(s):\n\n"
+            parts.append(f"Found {len(issues)} issue(s):\n\n")
             for i, issue in enumerate(issues, 1):
-                report += f"{i}. {issue.get('location', 'Unknown location')}\n"
-                report += f"   Issue: {issue.get('issue', 'No description')}\n"
-                report += f"   Severity: {issue.get('severity', 'Unknown')}\n"
-                report += f"   Fix: {issue.get('suggestion', 'No suggestion')}\n\n"
+                parts.append(f"{i}. {issue.get('location', 'Unknown location')}\n")
+                parts.append(f"   Issue: {issue.get('issue', 'No description')}\n")
+                parts.append(f"   Severity: {issue.get('severity', 'Unknown')}\n")
+                parts.append(f"   Fix: {issue.get('suggestion', 'No suggestion')}\n\n")
         else:
-            report += "✅ No issues found!\n\n"
+            parts.append("✅ No issues found!\n\n")
 
         if "overall_assessment" in parsed:
-            report += f"Overall: {parsed['overall_assessment']}\n"
+            parts.append(f"Overall: {parsed['overall_assessment']}\n")
     else:
         # Fallback to raw text
-        report += "VLM Analysis:\n"
-        report += "-" * 80 + "\n"
-        report += analysis_text + "\n"
+        parts.append("VLM Analysis:\n")
+        parts.append(f"{DASH}\n")
+        parts.append(analysis_text + "\n")
+
+    parts.append(f"\n{BAR}\n")
+    return "".join(parts)
+
+def get_screenshots(audit_dir: Path, patterns: Sequence[str] = ("*.png",),
+                    limit: Optional[int] = None) -> List[Path]:
+    """Get screenshots from audit directory matching any of the glob patterns.
+
+    The directory is read once however many patterns are given. As with
+    Path.glob(), a leading "*" also matches dot-files such as
+    ``.draft.png``; only regular files are returned. With ``limit``, only the first ``limit`` names in sorted
+    order are kept, using a bounded heap rather than sorting the whole
+    directory.
+    """
+    screenshots_dir = audit_dir / "screenshots"
+    matches = re.compile("|".join(fnmatch.translate(p) for p in patterns)).match
+    try:
+        with os.scandir(screenshots_dir) as it:
+            candidates = (
+                entry.name for entry in it
+                if matches(entry.name) and entry.is_file()
+            )
+            names = sorted(candidates) if limit is None else heapq.nsmallest(limit, candidates)
+    except FileNotFoundError:
+        return []
+    return [screenshots_dir / name for name in names]
+
+def record_vlm_result(screenshot: Path, result: dict) -> dict:
+    """Turn a raw VLM result into the entry stored for a screenshot.
+
+    The response is parsed once; "issues" is None when it has no issue list.
+    """
+    if not result["success"]:
+        print(f"   ❌ Failed: {result['error']}")
+        return {
+            "success": False,
+            "error": result["error"],
+            "screenshot": screenshot.name
+        }
 
-    report += "\n" + "="*80 + "\n"
-    return report
+    parsed = parse_json_from_response(result["analysis"])
+    issues = parsed["issues"] if isinstance(parsed, dict) and "issues" in parsed else None
+    if issues is not None:
+        issue_count = len(issues)
+        print(f"   {'⚠️ ' if issue_count > 0 else '✅'} {issue_count} issue(s)")
+    else:
+        print(f"   ✅ Complete")
+
+    return {
+        "success": True,
+        "analysis": result["analysis"],
+        "parsed": parsed,
+        "issues": issues,
+        "screenshot": screenshot.name
+    }
 
 def main():
     import argparse
@@ -338,7 +586,7 @@ Examples:
     # Save raw response if requested
     if args.save_response:
         json_path = screenshot_path.with_suffix(".response.json")
-        json_path.write_text(json.dumps(result["raw_response"], indent=2))
+        json_path.write_bytes(json_dumps(result["raw_response"], indent=True))
         print(f"💾 Raw response saved to: {json_path}")
 
 if __name__ == "__main__":
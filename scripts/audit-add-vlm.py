@@ -22,12 +22,17 @@ Usage:
 
     # Specific screens only
     python3 scripts/audit-add-vlm.py --screens "settings-*"
+
+    # Ignore cached results from earlier runs
+    python3 scripts/audit-add-vlm.py --refresh
 """
 
 import sys
-import json
+import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 import re
 
 # Import analyze_ui functions
@@ -36,8 +41,18 @@ try:
     from analyze_ui import (
         analyze_image_with_vlm,
         check_vlm_health,
-        parse_json_from_response,
-        DEFAULT_PROMPT
+        evict_vlm_cache,
+        get_screenshots,
+        json_dumps,
+        load_cached_vlm_result,
+        record_vlm_result,
+        store_cached_vlm_result,
+        vlm_cache_key,
+        BAR,
+        DASH,
+        DEFAULT_JOBS,
+        DEFAULT_PROMPT,
+        VLM_CACHE_DIR
     )
 except ImportError:
     print("Error: analyze_ui.py not found in scripts/")
@@ -45,69 +60,18 @@ except ImportError:
 
 AUDIT_BASE = Path.home() / "Desktop" / "talkie-audit"
 
-def find_latest_audit_run() -> Optional[Path]:
-    """Find the latest audit run directory."""
-    if not AUDIT_BASE.exists():
-        return None
-    runs = sorted(AUDIT_BASE.glob("run-*"), reverse=True)
-    return runs[0] if runs else None
-
-def get_screenshots(audit_dir: Path, pattern: str = "*.png") -> List[Path]:
-    """Get all screenshots from audit directory."""
-    screenshots_dir = audit_dir / "screenshots"
-    if not screenshots_dir.exists():
-        return []
-    return sorted(screenshots_dir.glob(pattern))
-
-def analyze_with_vlm(screenshots: List[Path], prompt: str) -> Dict[str, dict]:
-    """Run VLM analysis on screenshots, return results keyed by filename."""
-    results = {}
-    total = len(screenshots)
-
-    print(f"\n🔍 Analyzing {total} screenshots with VLM...")
-    print(f"📝 Prompt: {prompt[:80]}...\n" if len(prompt) > 80 else f"📝 Prompt: {prompt}\n")
-
-    for i, screenshot in enumerate(screenshots, 1):
-        filename = screenshot.stem
-        print(f"[{i}/{total}] {filename}")
-
-        result = analyze_image_with_vlm(screenshot, prompt)
-
-        if result["success"]:
-            parsed = parse_json_from_response(result["analysis"])
-            results[filename] = {
-                "success": True,
-                "analysis": result["analysis"],
-                "parsed": parsed,
-                "screenshot": screenshot.name
-            }
-
-            if parsed and "issues" in parsed:
-                issue_count = len(parsed["issues"])
-                print(f"   {'⚠️ ' if issue_count > 0 else '✅'} {issue_count} issue(s)")
-            else:
-                print(f"   ✅ Complete")
-        else:
-            results[filename] = {
-                "success": False,
-                "error": result["error"],
-                "screenshot": screenshot.name
-            }
-            print(f"   ❌ Failed: {result['error']}")
-
-    return results
-
-def inject_vlm_into_html(html_path: Path, vlm_results: Dict[str, dict], output_path: Path) -> bool:
-    """Inject VLM analysis into existing HTML report."""
-    if not html_path.exists():
-        print(f"❌ HTML report not found: {html_path}")
-        return False
+REPORT_TITLE = "<title>Design Audit Report</title>"
+REPORT_TITLE_VLM = "<title>Design Audit Report (with VLM)</title>"
 
-    html = html_path.read_text()
+# Screen dossiers in the audit report, and the compiler output inside each
+DOSSIER_RE = re.compile(r'<div class="dossier" id="dossier-([^"]+)">')
+DOSSIER_ISSUES_MARKER = '<div class="dossier-issues">'
 
-    # Add VLM CSS styles
-    vlm_css = """
+# VLM CSS styles, inserted before </head>; the marker makes re-injection a no-op
+VLM_CSS_MARKER = "/* talkie-vlm-css v1 */"
+VLM_CSS = """
     <style>
+        """ + VLM_CSS_MARKER + """
         .vlm-section {
             margin-top: 30px;
             padding: 20px;
@@ -202,27 +166,62 @@ def inject_vlm_into_html(html_path: Path, vlm_results: Dict[str, dict], output_p
     </style>
     """
 
-    # Insert CSS before </head>
-    html = html.replace("</head>", vlm_css + "\n</head>")
-
-    # For each screenshot section in HTML, add VLM analysis
-    for filename, vlm_data in vlm_results.items():
-        if not vlm_data["success"]:
-            continue
+def find_latest_audit_run() -> Optional[Path]:
+    """Find the latest audit run directory."""
+    if not AUDIT_BASE.exists():
+        return None
+    runs = sorted(AUDIT_BASE.glob("run-*"), reverse=True)
+    return runs[0] if runs else None
 
-        parsed = vlm_data.get("parsed")
-        if not parsed or "issues" not in parsed:
-            continue
+def analyze_with_vlm(screenshots: List[Path], prompt: str, jobs: int = DEFAULT_JOBS,
+                     use_cache: bool = True, refresh: bool = False) -> Dict[str, dict]:
+    """Run VLM analysis on screenshots, return results keyed by filename.
 
-        issues = parsed["issues"]
+    Up to ``jobs`` requests are in flight at once. Results come back in
+    ``screenshots`` order regardless of completion order. Unless
+    ``use_cache`` is off, results are read from and written to the VLM
+    cache; ``refresh`` skips the read but still writes.
+    """
+    results = {}
+    total = len(screenshots)
 
-        # Count issues by severity
-        high_count = sum(1 for i in issues if i.get("severity", "").lower() == "high")
-        medium_count = sum(1 for i in issues if i.get("severity", "").lower() == "medium")
-        low_count = sum(1 for i in issues if i.get("severity", "").lower() == "low")
+    print(f"\n🔍 Analyzing {total} screenshots with VLM...")
+    print(f"📝 Prompt: {prompt[:80]}...\n" if len(prompt) > 80 else f"📝 Prompt: {prompt}\n")
 
-        # Build VLM section HTML (matching compiler output structure)
-        vlm_html = f"""
+    def analyze_one(screenshot: Path) -> Tuple[dict, bool]:
+        if not use_cache:
+            return analyze_image_with_vlm(screenshot, prompt), False
+        # One read serves both the cache key and the upload on a miss
+        data = screenshot.read_bytes()
+        key = vlm_cache_key(screenshot, prompt, data=data)
+        if not refresh:
+            cached = load_cached_vlm_result(key)
+            if cached is not None:
+                return cached, True
+        result = analyze_image_with_vlm(screenshot, prompt, data=data)
+        store_cached_vlm_result(key, result)
+        return result, False
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(analyze_one, s): s for s in screenshots}
+        for i, future in enumerate(as_completed(futures), 1):
+            screenshot = futures[future]
+            result, cached = future.result()
+            print(f"[{i}/{total}] {screenshot.stem}{' (cached)' if cached else ''}")
+            results[screenshot.stem] = record_vlm_result(screenshot, result)
+
+    if use_cache:
+        evict_vlm_cache()
+
+    return {s.stem: results[s.stem] for s in screenshots}
+
+def build_vlm_section(issues: List[dict]) -> str:
+    """Build the Visual Analysis block for one screen (matching compiler output structure)."""
+    # Count issues by severity
+    severities = Counter(i.get("severity", "").lower() for i in issues)
+    high_count, medium_count, low_count = severities["high"], severities["medium"], severities["low"]
+
+    vlm_html = f"""
             <div class="dossier-issues" style="margin-bottom: 20px;">
                 <h3>Visual Analysis</h3>
                 <div class="compiler-output">
@@ -233,26 +232,26 @@ def inject_vlm_into_html(html_path: Path, vlm_results: Dict[str, dict], output_p
                     </div>
 """
 
-        if issues:
-            for issue in issues:
-                location = issue.get("location", "Unknown location")
-                description = issue.get("issue", "No description")
-                severity = issue.get("severity", "Unknown").lower()
-                suggestion = issue.get("suggestion", "")
-
-                severity_color = {
-                    "high": "#991b1b",
-                    "medium": "#92400e",
-                    "low": "#1e40af"
-                }.get(severity, "#6b7280")
-
-                severity_bg = {
-                    "high": "#fee2e2",
-                    "medium": "#fef3c7",
-                    "low": "#dbeafe"
-                }.get(severity, "#f3f4f6")
-
-                vlm_html += f"""
+    if issues:
+        for issue in issues:
+            location = issue.get("location", "Unknown location")
+            description = issue.get("issue", "No description")
+            severity = issue.get("severity", "Unknown").lower()
+            suggestion = issue.get("suggestion", "")
+
+            severity_color = {
+                "high": "#991b1b",
+                "medium": "#92400e",
+                "low": "#1e40af"
+            }.get(severity, "#6b7280")
+
+            severity_bg = {
+                "high": "#fee2e2",
+                "medium": "#fef3c7",
+                "low": "#dbeafe"
+            }.get(severity, "#f3f4f6")
+
+            vlm_html += f"""
                     <div class="issue-category">
                         <div class="category-header">
                             <span class="category-code" style="background: {severity_bg}; color: {severity_color};">VLM-{severity.upper()}</span>
@@ -266,37 +265,86 @@ def inject_vlm_into_html(html_path: Path, vlm_results: Dict[str, dict], output_p
                         </div>
                     </div>
 """
-        else:
-            vlm_html += """
+    else:
+        vlm_html += """
                     <div style="padding: 20px; text-align: center; color: #059669; font-weight: 500;">
                         ✅ No visual issues detected
                     </div>
 """
 
-        vlm_html += """
+    vlm_html += """
                 </div>
             </div>
 """
+    return vlm_html
+
+def has_vlm_issues(vlm_results: Dict[str, dict]) -> bool:
+    """Whether any screen came back with at least one issue."""
+    return any(r.get("issues") for r in vlm_results.values())
+
+def inject_vlm_into_html(html_path: Path, vlm_results: Dict[str, dict], output_path: Path) -> bool:
+    """Inject VLM analysis into existing HTML report.
+
+    All anchors are located in one forward scan of the report, then the
+    output is stitched together once from the original text and the
+    inserted blocks. With no issues to show, the report is copied as-is.
+    """
+    if not html_path.exists():
+        print(f"❌ HTML report not found: {html_path}")
+        return False
+
+    if not has_vlm_issues(vlm_results):
+        shutil.copyfile(html_path, output_path)
+        return True
+
+    html = html_path.read_text(encoding="utf-8")
 
-        # Find the dossier for this screen and inject VLM section BEFORE compiler output
-        dossier_pattern = f'<div class="dossier" id="dossier-{filename}">'
-        dossier_match = re.search(re.escape(dossier_pattern), html)
+    # Build every VLM section up front, keyed by dossier id
+    sections = {}
+    for filename, vlm_data in vlm_results.items():
+        issues = vlm_data.get("issues")
+        if issues is None:
+            continue
+
+        sections[filename] = build_vlm_section(issues)
 
-        if dossier_match:
-            # Find the first occurrence of <div class="dossier-issues"> after this dossier
-            search_start = dossier_match.end()
-            issues_pattern = '<div class="dossier-issues">'
-            issues_pos = html.find(issues_pattern, search_start)
+    # Edits are (start, end, text); start == end is a pure insertion
+    edits = []
 
-            if issues_pos > 0:
-                # Insert VLM section before the compiler output section
-                html = html[:issues_pos] + vlm_html + html[issues_pos:]
+    head_end = html.find("</head>")
+    if head_end != -1:
+        # Update title
+        title_pos = html.find(REPORT_TITLE, 0, head_end)
+        if title_pos != -1:
+            edits.append((title_pos, title_pos + len(REPORT_TITLE), REPORT_TITLE_VLM))
 
-    # Update title
-    html = html.replace("<title>Design Audit Report</title>", "<title>Design Audit Report (with VLM)</title>")
+        # Insert CSS before </head>, unless a previous run already did
+        if html.find(VLM_CSS_MARKER, 0, head_end) == -1:
+            edits.append((head_end, head_end, VLM_CSS + "\n"))
 
-    # Save updated HTML
-    output_path.write_text(html)
+    # Inject each VLM section BEFORE the first compiler output of its dossier
+    for match in DOSSIER_RE.finditer(html, max(head_end, 0)):
+        vlm_html = sections.pop(match.group(1), None)
+        if vlm_html is None:
+            continue
+        issues_pos = html.find(DOSSIER_ISSUES_MARKER, match.end())
+        if issues_pos > 0:
+            edits.append((issues_pos, issues_pos, vlm_html))
+        if not sections:
+            break  # Every section is placed; skip the rest of the report
+
+    edits.sort(key=lambda edit: edit[0])
+    parts = []
+    cursor = 0
+    for start, end, text in edits:
+        parts.append(html[cursor:start])
+        parts.append(text)
+        cursor = end
+    parts.append(html[cursor:])
+
+    # Save updated HTML, encoding part by part rather than joining first
+    with output_path.open("wb", buffering=1 << 20) as f:
+        f.writelines(part.encode("utf-8") for part in parts)
     return True
 
 def generate_vlm_summary(vlm_results: Dict[str, dict], output_path: Path):
@@ -308,66 +356,54 @@ def generate_vlm_summary(vlm_results: Dict[str, dict], output_path: Path):
     medium_count = 0
     low_count = 0
 
-    summary = "="*80 + "\n"
-    summary += "VLM Visual Analysis Summary\n"
-    summary += "="*80 + "\n\n"
-
-    summary += f"Screens analyzed: {total}\n"
-    summary += f"Successful analyses: {successful}\n\n"
-
+    # Tally raw severities in one pass, then bucket each distinct value once
+    severities = Counter()
     for filename, data in vlm_results.items():
-        if not data["success"]:
-            continue
-
-        parsed = data.get("parsed")
-        if not parsed or "issues" not in parsed:
-            continue
-
-        issues = parsed["issues"]
+        issues = data.get("issues")
         if not issues:
             continue
 
         total_issues += len(issues)
-
-        for issue in issues:
-            severity = issue.get("severity", "").lower()
-            if "high" in severity:
-                high_count += 1
-            elif "medium" in severity:
-                medium_count += 1
-            elif "low" in severity:
-                low_count += 1
-
-    summary += f"Total issues found: {total_issues}\n"
-    summary += f"  - High severity: {high_count}\n"
-    summary += f"  - Medium severity: {medium_count}\n"
-    summary += f"  - Low severity: {low_count}\n"
-    summary += "\n" + "-"*80 + "\n\n"
+        severities.update(issue.get("severity", "").lower() for issue in issues)
+
+    for severity, count in severities.items():
+        if "high" in severity:
+            high_count += count
+        elif "medium" in severity:
+            medium_count += count
+        elif "low" in severity:
+            low_count += count
+
+    out = [
+        f"{BAR}\n",
+        "VLM Visual Analysis Summary\n",
+        f"{BAR}\n\n",
+        f"Screens analyzed: {total}\n",
+        f"Successful analyses: {successful}\n\n",
+        f"Total issues found: {total_issues}\n",
+        f"  - High severity: {high_count}\n",
+        f"  - Medium severity: {medium_count}\n",
+        f"  - Low severity: {low_count}\n",
+        f"\n{DASH}\n\n",
+    ]
 
     # List issues by screen
     for filename, data in vlm_results.items():
-        if not data["success"]:
-            continue
-
-        parsed = data.get("parsed")
-        if not parsed or "issues" not in parsed:
-            continue
-
-        issues = parsed["issues"]
+        issues = data.get("issues")
         if not issues:
             continue
 
-        summary += f"📸 {filename}\n"
+        out.append(f"📸 {filename}\n")
         for i, issue in enumerate(issues, 1):
             severity = issue.get("severity", "Unknown")
             location = issue.get("location", "Unknown")
             description = issue.get("issue", "No description")
-            summary += f"   {i}. [{severity}] {location}\n"
-            summary += f"      {description}\n"
-        summary += "\n"
+            out.append(f"   {i}. [{severity}] {location}\n")
+            out.append(f"      {description}\n")
+        out.append("\n")
 
-    summary += "="*80 + "\n"
-    output_path.write_text(summary)
+    out.append(f"{BAR}\n")
+    output_path.write_bytes("".join(out).encode("utf-8"))
 
 def main():
     import argparse
@@ -380,6 +416,10 @@ def main():
     parser.add_argument("audit_dir", nargs="?", type=Path, help="Audit run directory (default: latest)")
     parser.add_argument("--prompt", help="Custom VLM analysis prompt (default: light mode check)")
     parser.add_argument("--screens", help="Screen patterns to analyze (comma-separated, e.g. 'settings-*')")
+    parser.add_argument("--no-cache", action="store_true", help=f"Don't read or write the VLM result cache ({VLM_CACHE_DIR})")
+    parser.add_argument("--refresh", action="store_true", help="Re-run every screenshot, replacing cached results")
+    parser.add_argument("--verbose-json", action="store_true", help="Include raw VLM responses in vlm-results.json")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Concurrent VLM requests (default: {DEFAULT_JOBS})")
 
     args = parser.parse_args()
 
@@ -402,10 +442,8 @@ def main():
 
     # Get screenshots
     if args.screens:
-        patterns = args.screens.split(",")
-        screenshots = []
-        for p in patterns:
-            screenshots.extend(get_screenshots(audit_dir, p.strip() + (".png" if not p.endswith(".png") else "")))
+        patterns = [p.strip() for p in args.screens.split(",")]
+        screenshots = get_screenshots(audit_dir, [p if p.endswith(".png") else p + ".png" for p in patterns])
     else:
         screenshots = get_screenshots(audit_dir)
 
@@ -417,7 +455,8 @@ def main():
 
     # Run VLM analysis
     prompt = args.prompt or DEFAULT_PROMPT
-    vlm_results = analyze_with_vlm(screenshots, prompt)
+    vlm_results = analyze_with_vlm(screenshots, prompt, args.jobs,
+                                   use_cache=not args.no_cache, refresh=args.refresh)
 
     # Inject into HTML report
     html_path = audit_dir / "report.html"
@@ -426,7 +465,10 @@ def main():
     if html_path.exists():
         print(f"\n📄 Injecting VLM analysis into HTML report...")
         if inject_vlm_into_html(html_path, vlm_results, output_path):
-            print(f"✅ Updated report: {output_path}")
+            if has_vlm_issues(vlm_results):
+                print(f"✅ Updated report: {output_path}")
+            else:
+                print(f"✅ No visual issues found - report copied unchanged: {output_path}")
         else:
             print(f"⚠️  Could not update HTML report")
     else:
@@ -439,11 +481,29 @@ def main():
 
     # Save JSON
     json_path = audit_dir / "vlm-results.json"
-    json_path.write_text(json.dumps({
+    # Raw response text duplicates "parsed" when the reply was JSON; a reply
+    # that wasn't keeps its text, as the only record of what the model said
+    def slim_result(r: dict) -> dict:
+        entry = {"success": r["success"], "screenshot": r["screenshot"]}
+        if not r["success"]:
+            entry["error"] = r.get("error")
+            return entry
+        entry["parsed"] = r["parsed"]
+        if r["parsed"] is None:
+            entry["analysis"] = r["analysis"]
+        return entry
+
+    if args.verbose_json:
+        json_results = vlm_results
+    else:
+        json_results = {name: slim_result(r) for name, r in vlm_results.items()}
+
+    # Results are plain JSON types already (names, not Paths), so no default= hook
+    json_path.write_bytes(json_dumps({
         "audit_dir": str(audit_dir),
         "prompt": prompt,
-        "results": vlm_results
-    }, indent=2, default=str))
+        "results": json_results
+    }, indent=True))
     print(f"✅ VLM JSON: {json_path}")
 
     # Open updated report
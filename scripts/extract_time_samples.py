@@ -10,19 +10,36 @@ Usage:
 """
 
 import argparse
+import functools
+import re
 import subprocess
 import sys
 import os
 from pathlib import Path
 
+# Common Time Profiler schemas, in order of preference
+TIME_PROFILE_SCHEMAS = [
+    "time-sample",
+    "time-profile",
+    "cpu-profile",
+]
 
-def list_tables(trace_path: str) -> list[str]:
-    """List available tables in the trace file."""
-    result = subprocess.run(
+SCHEMA_RE = re.compile(r'schema="([^"]+)"')
+
+
+@functools.lru_cache(maxsize=4)
+def read_toc(trace_path: str) -> subprocess.CompletedProcess:
+    """Run `xctrace export --toc` once per trace; later callers reuse the result."""
+    return subprocess.run(
         ["xcrun", "xctrace", "export", "--input", trace_path, "--toc"],
         capture_output=True,
         text=True,
     )
+
+
+def list_tables(trace_path: str) -> list[str]:
+    """List available tables in the trace file."""
+    result = read_toc(trace_path)
     if result.returncode != 0:
         print(f"Error listing tables: {result.stderr}", file=sys.stderr)
         return []
@@ -38,11 +55,7 @@ def list_tables(trace_path: str) -> list[str]:
 
 def find_time_sample_schema(trace_path: str) -> str | None:
     """Find the time-sample schema in the trace."""
-    result = subprocess.run(
-        ["xcrun", "xctrace", "export", "--input", trace_path, "--toc"],
-        capture_output=True,
-        text=True,
-    )
+    result = read_toc(trace_path)
     if result.returncode != 0:
         return None
 
@@ -63,20 +76,33 @@ def find_time_sample_schema(trace_path: str) -> str | None:
     return None
 
 
-def export_time_samples(trace_path: str, output_path: str, schema: str | None = None) -> bool:
-    """Export time samples from trace to XML."""
+def output_size(path: str) -> int | None:
+    """Size of the exported file, or None if it wasn't written."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def export_time_samples(trace_path: str, output_path: str, schema: str | None = None) -> int | None:
+    """Export time samples from trace to XML. Returns the bytes written, or None on failure."""
 
-    # If no schema specified, try common ones
+    # If no schema specified, try the common ones the trace actually has
     schemas_to_try = []
     if schema:
         schemas_to_try.append(schema)
     else:
-        # Try common Time Profiler schemas
-        schemas_to_try = [
-            "time-sample",
-            "time-profile",
-            "cpu-profile",
-        ]
+        toc = read_toc(trace_path)
+        if toc.returncode == 0:
+            available = set(SCHEMA_RE.findall(toc.stdout))
+            schemas_to_try = [s for s in TIME_PROFILE_SCHEMAS if s in available]
+            if not schemas_to_try:
+                detected = find_time_sample_schema(trace_path)
+                if detected:
+                    schemas_to_try.append(detected)
+        else:
+            # No TOC to go on - try common Time Profiler schemas
+            schemas_to_try = list(TIME_PROFILE_SCHEMAS)
 
     for schema_name in schemas_to_try:
         print(f"Trying schema: {schema_name}")
@@ -93,11 +119,11 @@ def export_time_samples(trace_path: str, output_path: str, schema: str | None =
             text=True,
         )
 
-        if result.returncode == 0 and os.path.exists(output_path):
-            size = os.path.getsize(output_path)
-            if size > 100:  # Sanity check - should have some content
+        if result.returncode == 0:
+            size = output_size(output_path)
+            if size is not None and size > 100:  # Sanity check - should have some content
                 print(f"Successfully exported using schema: {schema_name}")
-                return True
+                return size
 
     # If specific schemas didn't work, try exporting all data
     print("Trying full export...")
@@ -111,12 +137,14 @@ def export_time_samples(trace_path: str, output_path: str, schema: str | None =
         text=True,
     )
 
-    if result.returncode == 0 and os.path.exists(output_path):
-        print("Exported full trace data")
-        return True
+    if result.returncode == 0:
+        size = output_size(output_path)
+        if size is not None:
+            print("Exported full trace data")
+            return size
 
     print(f"Export failed: {result.stderr}", file=sys.stderr)
-    return False
+    return None
 
 
 def main():
@@ -152,11 +180,7 @@ def main():
 
     if args.list_tables:
         print("Trace table of contents:")
-        result = subprocess.run(
-            ["xcrun", "xctrace", "export", "--input", trace_path, "--toc"],
-            capture_output=True,
-            text=True,
-        )
+        result = read_toc(trace_path)
         print(result.stdout)
         if result.stderr:
             print(result.stderr, file=sys.stderr)
@@ -170,8 +194,8 @@ def main():
     print(f"Output: {args.output}")
     print()
 
-    if export_time_samples(trace_path, str(output_path), args.schema):
-        size = output_path.stat().st_size
+    size = export_time_samples(trace_path, str(output_path), args.schema)
+    if size is not None:
         print(f"\nSuccess! Wrote {size:,} bytes to {args.output}")
         print(f"\nNext: scripts/top_hotspots.py --samples '{args.output}' --binary <path> --load-address <addr>")
     else:
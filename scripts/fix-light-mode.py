@@ -4,8 +4,13 @@ Automatically fix hardcoded colors for light mode compatibility.
 Replaces hardcoded Color.white/black.opacity() with Theme.current semantic tokens.
 """
 
+import bisect
+import functools
+import mmap
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple
 
@@ -44,90 +49,83 @@ SPECIAL_CASES = {
     ".foregroundColor(.secondary)": "Theme.current.foregroundSecondary",
 }
 
+# OPACITY_MAP as parallel arrays sorted by value, for bisecting
+_OPACITY_ITEMS = sorted((float(k), v) for k, v in OPACITY_MAP.items())
+_OPACITY_VALUES = [value for value, _ in _OPACITY_ITEMS]
+_OPACITY_TOKENS = [token for _, token in _OPACITY_ITEMS]
+
+# Every pattern fixed, as one alternation so each file is scanned once:
+#   Color.white.opacity(X) or Color.black.opacity(X)
+#   Color(white: 0.XX, alpha: 1.0) or Color(white: 0.XX)
+#   .foregroundColor(.primary/.secondary)
+# None of the replacements can match another branch, so this is
+# equivalent to applying the fixes one after another.
+_COLOR_RE = re.compile(
+    r'Color\.(?:white|black)\.opacity\((?P<opacity>[\d.]+)\)'
+    r'|Color\(white:\s*(?P<white>[\d.]+)(?:,\s*alpha:\s*[\d.]+)?\)'
+    r'|' + '|'.join(map(re.escape, SPECIAL_CASES))
+)
+
+# Same pattern over raw bytes, to rule files out before decoding them
+_COLOR_BYTES_RE = re.compile(_COLOR_RE.pattern.encode("ascii"))
+
+@functools.lru_cache(maxsize=256)
 def find_opacity_match(opacity_str: str) -> str:
-    """Find the best semantic token match for a given opacity value."""
+    """Find the best semantic token match for a given opacity value.
+
+    Memoized: a codebase repeats the same handful of literals, and
+    OPACITY_MAP is a constant for the life of the process.
+    """
     try:
         opacity = float(opacity_str)
 
-        # Find closest match
-        closest = min(OPACITY_MAP.keys(), key=lambda x: abs(float(x) - opacity))
-        if abs(float(closest) - opacity) <= 0.02:  # Within 2% tolerance
-            return OPACITY_MAP[closest]
+        # Find closest match; on a tie the lower value wins
+        i = bisect.bisect_left(_OPACITY_VALUES, opacity)
+        if i == len(_OPACITY_VALUES) or (
+            i > 0 and abs(_OPACITY_VALUES[i - 1] - opacity) <= abs(_OPACITY_VALUES[i] - opacity)
+        ):
+            i -= 1
+        if abs(_OPACITY_VALUES[i] - opacity) <= 0.02:  # Within 2% tolerance
+            return _OPACITY_TOKENS[i]
     except ValueError:
         pass
 
     # Default fallback
     return f"TalkieTheme.hover  // TODO: Review opacity {opacity_str}"
 
-def fix_color_opacity(content: str) -> Tuple[str, int]:
-    """Fix Color.white/black.opacity() patterns."""
-    changes = 0
-
-    # Pattern: Color.white.opacity(X) or Color.black.opacity(X)
-    pattern = r'Color\.(white|black)\.opacity\(([\d.]+)\)'
-
-    def replace_opacity(match):
-        nonlocal changes
-        color = match.group(1)  # white or black
-        opacity = match.group(2)  # numeric value
-
-        replacement = find_opacity_match(opacity)
-        changes += 1
-        return replacement
-
-    content = re.sub(pattern, replace_opacity, content)
-    return content, changes
-
-def fix_foreground_colors(content: str) -> Tuple[str, int]:
-    """Fix .foregroundColor(.primary/.secondary) patterns."""
-    changes = 0
-
-    for old, new in SPECIAL_CASES.items():
-        count = content.count(old)
-        if count > 0:
-            content = content.replace(old, f".foregroundColor({new})")
-            changes += count
-
-    return content, changes
-
-def fix_color_literals(content: str) -> Tuple[str, int]:
-    """Fix Color(white:) and Color(red:green:blue:) literals."""
-    changes = 0
+def replace_color(match: re.Match) -> str:
+    """Replacement for a single _COLOR_RE match."""
+    value = match.group("opacity") or match.group("white")
+    if value is not None:
+        return find_opacity_match(value)
+    return f".foregroundColor({SPECIAL_CASES[match.group(0)]})"
 
-    # Pattern: Color(white: 0.XX, alpha: 1.0) or Color(white: 0.XX)
-    pattern = r'Color\(white:\s*([\d.]+)(?:,\s*alpha:\s*[\d.]+)?\)'
-
-    def replace_literal(match):
-        nonlocal changes
-        white_val = match.group(1)
-        replacement = find_opacity_match(white_val)
-        changes += 1
-        return replacement
-
-    content = re.sub(pattern, replace_literal, content)
-    return content, changes
+def fix_colors(content: str) -> Tuple[str, int]:
+    """Fix opacity colors, Color(white:) literals and .foregroundColor(.primary/.secondary)."""
+    return _COLOR_RE.subn(replace_color, content)
 
 def process_file(filepath: Path, dry_run: bool = False) -> Tuple[int, bool]:
     """Process a single Swift file."""
     try:
-        content = filepath.read_text()
-        original_content = content
+        # Most files have nothing to fix: scan the mapped bytes and only
+        # decode when there's a hit
+        with open(filepath, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return 0, False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if not _COLOR_BYTES_RE.search(mm):
+                    return 0, False
+                content = mm[:].decode("utf-8")
 
         total_changes = 0
 
         # Apply all fixes
-        content, changes = fix_color_opacity(content)
-        total_changes += changes
-
-        content, changes = fix_foreground_colors(content)
-        total_changes += changes
-
-        content, changes = fix_color_literals(content)
+        content, changes = fix_colors(content)
         total_changes += changes
 
         if total_changes > 0:
             if not dry_run:
-                filepath.write_text(content)
+                filepath.write_bytes(content.encode("utf-8"))
             return total_changes, True
 
         return 0, False
@@ -170,8 +168,18 @@ def main():
     total_files_changed = 0
     total_changes = 0
 
-    for filepath in sorted(swift_files):
-        changes, modified = process_file(filepath, dry_run=args.dry_run)
+    # Files are independent and the work is pure CPU, so spread it across
+    # processes; map() keeps results in sorted order for the report
+    swift_files = sorted(swift_files)
+    worker = functools.partial(process_file, dry_run=args.dry_run)
+    if len(swift_files) > 1:
+        chunksize = max(1, len(swift_files) // (4 * (os.cpu_count() or 1)))
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(worker, swift_files, chunksize=chunksize))
+    else:
+        results = [worker(filepath) for filepath in swift_files]
+
+    for filepath, (changes, modified) in zip(swift_files, results):
         if modified:
             total_files_changed += 1
             total_changes += changes
@@ -7,6 +7,7 @@ PBXGroup, preserving folder structure. Creates backup before any changes.
 
 Usage:
     ./sync-xcode-files.py [project] [options] [--only PATTERN]
+    ./sync-xcode-files.py --all [options]
 
 Projects:
     macos       Talkie macOS app (default)
@@ -18,6 +19,8 @@ Options:
     --dry-run     Simulate add (no changes)
     --diff        Show unified diff (no changes)
     --only PAT    Only sync files matching pattern (e.g., "Bridge/*")
+    --all         Sync every project above, scanned in parallel
+    --no-cache    Don't read or write the parsed-project cache
 
 Examples:
     ./sync-xcode-files.py                         # Sync macOS (default)
@@ -25,6 +28,7 @@ Examples:
     ./sync-xcode-files.py ios                     # Sync iOS project
     ./sync-xcode-files.py ios --check             # Check iOS project
     ./sync-xcode-files.py ios --only "Bridge/*"   # Only sync Bridge files
+    ./sync-xcode-files.py --all --check           # Check every project
 What it does:
     1. Finds .swift files on disk not in project.pbxproj
     2. Parses PBXGroup hierarchy to find correct parent group
@@ -32,15 +36,27 @@ What it does:
     4. Adds file to parent group's children array
 
 Skips: build/, .build/, DerivedData/, packages/swift/, .swiftpm/, xcshareddata/
+
+Parsed project data is cached in ~/.cache/talkie-sync-xcode/, keyed by each
+project.pbxproj's mtime and size, so repeated --check/--diff runs skip the parse.
 """
 
+import functools
+import hashlib
+import io
+import mmap
 import os
+import pickle
 import re
 import sys
-import uuid
+import secrets
+import tempfile
 import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, TextIO, Tuple
 
 # Get the repo root (parent of scripts/)
 REPO_ROOT = Path(__file__).parent.parent.resolve()
@@ -70,65 +86,100 @@ PROJECTS = {
 # Directories to skip (default, overridden by project config)
 SKIP_DIRS = {'build', '.build', 'DerivedData', 'Packages', '.swiftpm', 'xcshareddata'}
 
+# Parsed-project cache; bump the version when the cached data changes shape
+CACHE_DIR = Path.home() / '.cache' / 'talkie-sync-xcode'
+CACHE_VERSION = 1
+MODEL_CACHE_FIELDS = ('groups', 'main_group_id', 'group_section', 'file_ref_section',
+                      'build_file_section', 'sources_files', 'child_index', 'used_ids')
+
+# pbxproj patterns, compiled once per process
+# Whole PBXGroup block - with or without /* Name */ comment (main group has no
+# name). Group bodies hold no nested braces, so the first '}' closes the block.
+_GROUP_RE = re.compile(
+    r'(?P<id>\b\w{24})(?:\s*/\*\s*(?P<name>[^*]*)\s*\*/)?\s*=\s*\{\s*isa = PBXGroup;(?P<body>[^}]*)\}'
+)
+_CHILDREN_RE = re.compile(r'children = \(([^)]*)\)')
+_CHILD_ID_RE = re.compile(r'(\w{24})')
+_PATH_RE = re.compile(r'path = ([^;]+);')
+_FILE_REF_RE = re.compile(rb'/\* ([^*]+\.swift) \*/ = \{isa = PBXFileReference')
+# Object definitions: every ID in the file is defined once at the top of a line
+_OBJECT_ID_RE = re.compile(r'^\t\t(\w{24}) ', re.MULTILINE)
+_MAIN_GROUP_KEY = 'mainGroup = '
+_SOURCES_RE = re.compile(r'(/\* Sources \*/ = \{\s*isa = PBXSourcesBuildPhase;[^}]*files = \()([^)]*)\)')
+
+
+def generate_uuid(used: Optional[set] = None) -> str:
+    """Generate a 24-char hex object ID like Xcode does, never one already in used."""
+    while True:
+        object_id = secrets.token_hex(12).upper()
+        if used is None:
+            return object_id
+        if object_id not in used:
+            used.add(object_id)
+            return object_id
+
+
+def _walk_swift_files(root: str, skip_dirs: set, known: frozenset):
+    """Yield .swift file paths under root not named in known, pruning skipped dirs."""
+    try:
+        it = os.scandir(root)
+    except OSError:
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in skip_dirs or entry.name.endswith('.xcodeproj'):
+                    continue
+                yield from _walk_swift_files(entry.path, skip_dirs, known)
+            elif entry.name.endswith('.swift') and entry.name not in known and entry.is_file():
+                yield entry.path
+
 
-def generate_uuid():
-    """Generate a 24-char hex UUID like Xcode does."""
-    return uuid.uuid4().hex[:24].upper()
+def find_swift_files(source_dir: Path, skip_dirs: set, known: frozenset = frozenset()) -> List[str]:
+    """Find .swift files in project, excluding build dirs and names in known.
 
+    Returns paths relative to source_dir, ordered component-wise like Paths.
+    """
+    root = str(source_dir)
+    prefix_len = len(root) + 1
+    rel_paths = [p[prefix_len:] for p in _walk_swift_files(root, skip_dirs, known)]
+    return sorted(rel_paths, key=lambda rel: rel.split(os.sep))
 
-def find_swift_files(source_dir: Path, skip_dirs: set):
-    """Find all .swift files in project, excluding build dirs."""
-    swift_files = []
-    for root, dirs, files in os.walk(source_dir):
-        dirs[:] = [d for d in dirs if d not in skip_dirs and not d.endswith('.xcodeproj')]
-        for f in files:
-            if f.endswith('.swift'):
-                swift_files.append(Path(root) / f)
-    return sorted(swift_files)
 
+def get_files_in_project(data) -> frozenset:
+    """Get set of filenames already in project from raw pbxproj bytes."""
+    return frozenset(m.group(1).decode('utf-8') for m in _FILE_REF_RE.finditer(data))
 
-def get_files_in_project(content):
-    """Get set of filenames already in project."""
-    pattern = r'/\* ([^*]+\.swift) \*/ = \{isa = PBXFileReference'
-    return set(re.findall(pattern, content))
+
+def scan_pbxproj(pbxproj: Path) -> Tuple[bool, frozenset]:
+    """Map project.pbxproj once. Returns (uses Xcode auto-sync, filenames in project)."""
+    with open(pbxproj, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False, frozenset()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # PBXFileSystemSynchronizedRootGroup means Xcode keeps files in sync itself
+            if mm.find(b'PBXFileSystemSynchronizedRootGroup') != -1:
+                return True, frozenset()
+            return False, get_files_in_project(mm)
 
 
 def parse_groups(content: str) -> Dict[str, dict]:
     """Parse all PBXGroup entries and return a dict of id -> group info."""
     groups = {}
 
-    # Find each group - with or without /* Name */ comment
-    # Pattern 1: ID /* Name */ = { isa = PBXGroup;
-    # Pattern 2: ID = { isa = PBXGroup; (main group has no name)
-    group_header = r'(\w{24})(?:\s*/\*\s*([^*]*)\s*\*/)?\s*=\s*\{\s*isa = PBXGroup;'
-
-    for match in re.finditer(group_header, content):
-        group_id = match.group(1)
-        name = match.group(2).strip() if match.group(2) else ""
-
-        # Find the full block by matching braces
-        block_start = match.start()
-        brace_count = 0
-        block_end = block_start
-        for i, char in enumerate(content[block_start:], block_start):
-            if char == '{':
-                brace_count += 1
-            elif char == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    block_end = i + 1
-                    break
-
-        block = content[block_start:block_end]
+    for match in _GROUP_RE.finditer(content):
+        group_id = match['id']
+        name = match['name'].strip() if match['name'] else ""
+        block = match['body']
 
         # Extract children
-        children_match = re.search(r'children = \(([^)]*)\)', block)
+        children_match = _CHILDREN_RE.search(block)
         children = []
         if children_match:
-            children = re.findall(r'(\w{24})', children_match.group(1))
+            children = _CHILD_ID_RE.findall(children_match.group(1))
 
         # Extract path (may not exist - use name as default)
-        path_match = re.search(r'path = ([^;]+);', block)
+        path_match = _PATH_RE.search(block)
         path = path_match.group(1).strip().strip('"') if path_match else name
 
         groups[group_id] = {
@@ -140,6 +191,16 @@ def parse_groups(content: str) -> Dict[str, dict]:
     return groups
 
 
+def find_main_group(content: str) -> Optional[str]:
+    """Return the project's mainGroup ID (fixed-string lookup, no regex)."""
+    idx = content.find(_MAIN_GROUP_KEY)
+    if idx == -1:
+        return None
+    start = idx + len(_MAIN_GROUP_KEY)
+    group_id = content[start:start + 24]
+    return group_id if len(group_id) == 24 and group_id.isalnum() else None
+
+
 def find_group_by_path(content: str, groups: Dict, path_parts: List[str]) -> Optional[str]:
     """Find a group ID by traversing the path. Returns None if not found."""
     if not path_parts:
@@ -147,13 +208,10 @@ def find_group_by_path(content: str, groups: Dict, path_parts: List[str]) -> Opt
 
     # Find root groups (direct children of main project group)
     # Look for the main project group that contains Views, Models, etc.
-    main_group_pattern = r'mainGroup = (\w{24})'
-    main_match = re.search(main_group_pattern, content)
-    if not main_match:
+    current_group_id = find_main_group(content)
+    if not current_group_id:
         return None
 
-    current_group_id = main_match.group(1)
-
     for part in path_parts:
         found = False
         if current_group_id in groups:
@@ -168,87 +226,358 @@ def find_group_by_path(content: str, groups: Dict, path_parts: List[str]) -> Opt
     return current_group_id
 
 
-def add_child_to_group(content: str, group_id: str, child_id: str, child_name: str) -> str:
-    """Add a child reference to a group's children array."""
-    # Find the group and its children section
-    group_pattern = rf'({group_id} /\* [^*]* \*/ = \{{\s*isa = PBXGroup;\s*children = \()([^)]*)\)'
-
-    def replacer(match):
-        prefix = match.group(1)
-        children = match.group(2)
-        new_child = f'\n\t\t\t\t{child_id} /* {child_name} */,'
-        return f'{prefix}{new_child}{children})'
-
-    return re.sub(group_pattern, replacer, content, count=1)
-
-
-def create_group(content: str, parent_group_id: str, group_name: str) -> Tuple[str, str]:
-    """Create a new PBXGroup and add it to parent. Returns (new_content, new_group_id)."""
-    new_group_id = generate_uuid()
+@functools.lru_cache(maxsize=None)
+def _group_children_re(group_id: str) -> re.Pattern:
+    """Compiled pattern for a group's children section, one per group ID."""
+    return re.compile(rf'({group_id} /\* [^*]* \*/ = \{{\s*isa = PBXGroup;\s*children = \()([^)]*)\)')
+
+
+class ContentEditor:
+    """Pending inserts against a base string, applied in a single pass."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.edits: List[Tuple[int, str]] = []
+
+    def insert(self, pos: int, text: str):
+        self.edits.append((pos, text))
+
+    def build(self) -> str:
+        """Return base with all inserts applied (stable for equal offsets)."""
+        self.edits.sort(key=lambda edit: edit[0])
+        parts = []
+        prev = 0
+        for pos, text in self.edits:
+            parts.append(self.base[prev:pos])
+            parts.append(text)
+            prev = pos
+        parts.append(self.base[prev:])
+        return ''.join(parts)
+
+    def _changes(self):
+        """Yield (line_no, start, end, removed, added) line-level changes, in order.
+
+        start/end are base offsets of the first and past-the-last removed line.
+        """
+        base = self.base
+
+        # '\n...' inserted just before a newline equals '...\n' inserted after
+        # it (when nothing else goes at that offset); normalizing turns the
+        # usual pbxproj inserts into whole-line ones
+        shared = Counter(pos for pos, _ in self.edits)
+        edits = []
+        for pos, text in self.edits:
+            if text.startswith('\n') and shared[pos] == 1 and base.startswith('\n', pos):
+                edits.append((pos + 1, pos, text[1:] + '\n'))
+            else:
+                edits.append((pos, pos, text))
+        edits.sort(key=lambda edit: edit[:2])
+
+        line_no = 0
+        counted = 0
+        i = 0
+        while i < len(edits):
+            pos, _, text = edits[i]
+            line_start = base.rfind('\n', 0, pos) + 1 if pos else 0
+            line_no += base.count('\n', counted, line_start)
+            counted = line_start
+
+            if pos == line_start and text.endswith('\n'):
+                # Whole lines inserted before line_no
+                i += 1
+                yield line_no, pos, pos, [], text.splitlines(keepends=True)
+                continue
+
+            line_end = base.find('\n', pos)
+            line_end = len(base) if line_end == -1 else line_end + 1
+
+            # Apply every insert that lands inside this line
+            new = [base[line_start:pos]]
+            prev = pos
+            while i < len(edits) and (edits[i][0] < line_end or line_end == len(base)):
+                pos, _, text = edits[i]
+                new.append(base[prev:pos])
+                new.append(text)
+                prev = pos
+                i += 1
+            new.append(base[prev:line_end])
+
+            old_lines = base[line_start:line_end].splitlines(keepends=True)
+            new_lines = ''.join(new).splitlines(keepends=True)
+
+            # Trim lines the edit left untouched
+            lo = 0
+            while lo < len(old_lines) and lo < len(new_lines) and old_lines[lo] == new_lines[lo]:
+                lo += 1
+            hi_old, hi_new = len(old_lines), len(new_lines)
+            while hi_old > lo and hi_new > lo and old_lines[hi_old - 1] == new_lines[hi_new - 1]:
+                hi_old -= 1
+                hi_new -= 1
+
+            start = line_start + sum(map(len, old_lines[:lo]))
+            end = start + sum(map(len, old_lines[lo:hi_old]))
+            yield line_no + lo, start, end, old_lines[lo:hi_old], new_lines[lo:hi_new]
+
+    def build_diff(self, fromfile: str = '', tofile: str = '', context: int = 3) -> str:
+        """Unified diff of build() against base, without splitting all of base.
+
+        Only the lines around each insert are touched, so the cost is linear in
+        the size of the inserts rather than the size of the project file.
+        """
+        base = self.base
+
+        def lines_before(offset, limit):
+            start = offset
+            for _ in range(limit):
+                if start == 0:
+                    break
+                start = base.rfind('\n', 0, start - 1) + 1
+            return base[start:offset].splitlines(keepends=True)
 
-    # Create group entry
-    group_entry = f'''\t\t{new_group_id} /* {group_name} */ = {{
+        def lines_after(offset, limit):
+            end = offset
+            for _ in range(limit):
+                if end >= len(base):
+                    break
+                nl = base.find('\n', end)
+                end = len(base) if nl == -1 else nl + 1
+            return base[offset:end].splitlines(keepends=True)
+
+        # Same grouping as difflib: changes at most 2*context lines apart share a
+        # hunk, and touching changes merge into one block (removals first)
+        hunks = []
+        for change in self._changes():
+            if hunks:
+                prev = hunks[-1][-1]
+                gap = change[0] - (prev[0] + len(prev[3]))
+                if gap == 0:
+                    hunks[-1][-1] = (prev[0], prev[1], change[2],
+                                     prev[3] + change[3], prev[4] + change[4])
+                    continue
+                if gap <= 2 * context:
+                    hunks[-1].append(change)
+                    continue
+            hunks.append([change])
+
+        def format_range(start, length):
+            beginning = start + 1
+            if length == 1:
+                return f'{beginning}'
+            if not length:
+                beginning -= 1
+            return f'{beginning},{length}'
+
+        out = []
+        delta = 0
+        for hunk in hunks:
+            first_line, first_start = hunk[0][0], hunk[0][1]
+            leading = lines_before(first_start, context)
+            body = [' ' + line for line in leading]
+            a_len = b_len = len(leading)
+            for i, (line_no, start, end, removed, added) in enumerate(hunk):
+                body.extend('-' + line for line in removed)
+                body.extend('+' + line for line in added)
+                a_len += len(removed)
+                b_len += len(added)
+                if i + 1 < len(hunk):
+                    equal = base[end:hunk[i + 1][1]].splitlines(keepends=True)
+                else:
+                    equal = lines_after(end, context)
+                body.extend(' ' + line for line in equal)
+                a_len += len(equal)
+                b_len += len(equal)
+            a_start = first_line - len(leading)
+            b_start = a_start + delta
+            delta += sum(len(c[4]) - len(c[3]) for c in hunk)
+            if not out:
+                out.append(f'--- {fromfile}\n+++ {tofile}\n')
+            out.append(f'@@ -{format_range(a_start, a_len)} +{format_range(b_start, b_len)} @@\n')
+            out.extend(body)
+        return ''.join(out)
+
+
+@dataclass
+class ProjectModel:
+    """project.pbxproj parsed once, plus the entries queued for it.
+
+    Offsets index into `content` and stay valid because nothing is written
+    back until render(). Queued lists are in insertion order; render() emits
+    them newest-first at each offset, the same order repeated top-of-section
+    inserts would give.
+    """
+    content: str
+    groups: Dict[str, dict]
+    main_group_id: Optional[str]
+    group_section: Optional[int]
+    file_ref_section: Optional[int]
+    build_file_section: Optional[int]
+    sources_files: Optional[int]
+    child_index: Dict[Tuple[str, str], str] = field(default_factory=dict)
+    used_ids: set = field(default_factory=set)
+    new_groups: Dict[str, str] = field(default_factory=dict)
+    file_refs: List[str] = field(default_factory=list)
+    build_files: List[str] = field(default_factory=list)
+    sources_entries: List[str] = field(default_factory=list)
+    child_entries: Dict[str, List[str]] = field(default_factory=dict)
+    children_offsets: Dict[str, Optional[int]] = field(default_factory=dict)
+
+    def editor(self) -> 'ContentEditor':
+        """Collect every queued entry as an insert into the original content."""
+        editor = ContentEditor(self.content)
+
+        def queue(pos, entries):
+            if pos is not None and entries:
+                editor.insert(pos, ''.join(reversed(entries)))
+
+        group_entries = []
+        for group_id, group_name in self.new_groups.items():
+            children = ''.join(reversed(self.child_entries.get(group_id, [])))
+            group_entries.append(f'''\t\t{group_id} /* {group_name} */ = {{
 \t\t\tisa = PBXGroup;
-\t\t\tchildren = (
+\t\t\tchildren = ({children}
 \t\t\t);
 \t\t\tpath = {group_name};
 \t\t\tsourceTree = "<group>";
 \t\t}};
-'''
+''')
+        queue(self.group_section, group_entries)
+        queue(self.file_ref_section, self.file_refs)
+        queue(self.build_file_section, self.build_files)
+        queue(self.sources_files, self.sources_entries)
+        for group_id, pos in self.children_offsets.items():
+            queue(pos, self.child_entries.get(group_id))
+        return editor
 
-    # Insert in PBXGroup section
-    group_marker = '/* Begin PBXGroup section */'
-    idx = content.find(group_marker)
-    if idx != -1:
-        insert_pos = idx + len(group_marker) + 1
-        content = content[:insert_pos] + group_entry + content[insert_pos:]
+    def render(self) -> str:
+        """Splice every queued entry into the original content in one pass."""
+        return self.editor().build()
+
+
+def _section_offset(content: str, marker: str) -> Optional[int]:
+    """Offset just past a '/* Begin ... section */' marker line, if present."""
+    idx = content.find(marker)
+    return idx + len(marker) + 1 if idx != -1 else None
+
+
+def _cache_path(pbxproj: Path) -> Path:
+    """Cache file for a project, named by a hash of its path."""
+    digest = hashlib.sha256(str(pbxproj).encode('utf-8')).hexdigest()[:16]
+    return CACHE_DIR / f'{digest}.pkl'
+
+
+def file_stamp(st: os.stat_result) -> Tuple[int, int]:
+    """(mtime_ns, size) - changes whenever project.pbxproj is rewritten."""
+    return st.st_mtime_ns, st.st_size
+
+
+def load_cached_project(pbxproj: Path, stamp: Tuple[int, int]) -> Optional[dict]:
+    """Return the cache entry for pbxproj if it matches stamp, else None."""
+    try:
+        with open(_cache_path(pbxproj), 'rb') as f:
+            entry = pickle.load(f)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION or entry.get('stamp') != stamp:
+        return None
+    return entry
+
+
+def store_cached_project(pbxproj: Path, entry: dict):
+    """Atomically write a cache entry; caching is best-effort."""
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _cache_path(pbxproj))
+    except OSError:
+        pass
 
-    # Add to parent group's children
-    content = add_child_to_group(content, parent_group_id, new_group_id, group_name)
 
-    return content, new_group_id
+def index_child_groups(groups: Dict[str, dict]) -> Dict[Tuple[str, str], str]:
+    """Map (parent_id, path) -> first child group with that path."""
+    child_index = {}
+    for parent_id, group in groups.items():
+        for child_id in group['children']:
+            if child_id in groups:
+                child_index.setdefault((parent_id, groups[child_id]['path']), child_id)
+    return child_index
 
 
-def ensure_group_path(content: str, path_parts: List[str]) -> Tuple[str, str]:
-    """Ensure all groups in path exist, creating as needed. Returns (content, leaf_group_id)."""
+def load_project(content: str) -> ProjectModel:
+    """Parse project.pbxproj content once into a ProjectModel."""
     groups = parse_groups(content)
+    sources_match = _SOURCES_RE.search(content)
+    return ProjectModel(
+        content=content,
+        groups=groups,
+        child_index=index_child_groups(groups),
+        used_ids=set(_OBJECT_ID_RE.findall(content)),
+        main_group_id=find_main_group(content),
+        group_section=_section_offset(content, '/* Begin PBXGroup section */'),
+        file_ref_section=_section_offset(content, '/* Begin PBXFileReference section */'),
+        build_file_section=_section_offset(content, '/* Begin PBXBuildFile section */'),
+        sources_files=sources_match.end(1) if sources_match else None,
+    )
+
+
+def add_child_to_group(model: ProjectModel, group_id: str, child_id: str, child_name: str):
+    """Add a child reference to a group's children array."""
+    if group_id not in model.new_groups:
+        # Existing group: locate its children section once
+        if group_id not in model.children_offsets:
+            match = _group_children_re(group_id).search(model.content)
+            model.children_offsets[group_id] = match.end(1) if match else None
+        if model.children_offsets[group_id] is None:
+            return
+
+    model.child_entries.setdefault(group_id, []).append(f'\n\t\t\t\t{child_id} /* {child_name} */,')
+    if group_id in model.groups:
+        model.groups[group_id]['children'].append(child_id)
+    if child_id in model.groups:
+        model.child_index.setdefault((group_id, model.groups[child_id]['path']), child_id)
+
+
+def create_group(model: ProjectModel, parent_group_id: str, group_name: str) -> str:
+    """Create a new PBXGroup and add it to parent. Returns the new group ID."""
+    new_group_id = generate_uuid(model.used_ids)
+
+    model.new_groups[new_group_id] = group_name
+    model.groups[new_group_id] = {
+        'name': group_name,
+        'path': group_name,
+        'children': [],
+    }
+
+    # Add to parent group's children
+    add_child_to_group(model, parent_group_id, new_group_id, group_name)
+
+    return new_group_id
 
-    # Find main group
-    main_group_pattern = r'mainGroup = (\w{24})'
-    main_match = re.search(main_group_pattern, content)
-    if not main_match:
+
+def ensure_group_path(model: ProjectModel, path_parts: List[str]) -> str:
+    """Ensure all groups in path exist, creating as needed. Returns leaf_group_id."""
+    if model.main_group_id is None:
         raise ValueError("Could not find mainGroup")
 
-    current_group_id = main_match.group(1)
+    current_group_id = model.main_group_id
 
-    for i, part in enumerate(path_parts):
+    for part in path_parts:
         # Look for this part in current group's children
-        found_id = None
-        groups = parse_groups(content)  # Re-parse after modifications
-
-        if current_group_id in groups:
-            for child_id in groups[current_group_id]['children']:
-                if child_id in groups and groups[child_id]['path'] == part:
-                    found_id = child_id
-                    break
+        found_id = model.child_index.get((current_group_id, part))
 
         if found_id:
             current_group_id = found_id
         else:
             # Create the group
-            content, new_id = create_group(content, current_group_id, part)
-            current_group_id = new_id
+            current_group_id = create_group(model, current_group_id, part)
 
-    return content, current_group_id
+    return current_group_id
 
 
 def find_source_group(content: str, groups: Dict, group_name: str) -> Optional[str]:
     """Find a group by name (direct child of main group)."""
-    main_match = re.search(r'mainGroup = (\w{24})', content)
-    if not main_match:
-        return None
-
-    main_group_id = main_match.group(1)
+    main_group_id = find_main_group(content)
     if main_group_id not in groups:
         return None
 
@@ -259,180 +588,209 @@ def find_source_group(content: str, groups: Dict, group_name: str) -> Optional[s
     return None
 
 
-def add_file_to_project(content: str, filepath: Path, source_dir: Path, project_config: dict) -> str:
-    """Add a Swift file to the project.pbxproj with proper group handling."""
-    filename = filepath.name
-    rel_path = filepath.relative_to(source_dir)
-    path_parts = list(rel_path.parts[:-1])  # Directory parts without filename
+def add_file_to_project(model: ProjectModel, rel_path: str, project_config: dict):
+    """Queue a Swift file (path relative to source_dir) with proper group handling."""
+    *path_parts, filename = rel_path.split(os.sep)  # Directory parts, filename
 
-    file_ref_id = generate_uuid()
-    build_file_id = generate_uuid()
+    file_ref_id = generate_uuid(model.used_ids)
+    build_file_id = generate_uuid(model.used_ids)
 
     # 1. Ensure parent group exists and get its ID
     source_group_name = project_config.get('source_group')
     if path_parts:
-        content, parent_group_id = ensure_group_path(content, path_parts)
+        parent_group_id = ensure_group_path(model, path_parts)
     elif source_group_name:
         # Use configured source group for root-level files
-        groups = parse_groups(content)
-        parent_group_id = find_source_group(content, groups, source_group_name)
+        parent_group_id = find_source_group(model.content, model.groups, source_group_name)
     else:
-        # File at root - find main group
-        main_match = re.search(r'mainGroup = (\w{24})', content)
-        parent_group_id = main_match.group(1) if main_match else None
+        # File at root - use main group
+        parent_group_id = model.main_group_id
 
     # 2. Add PBXFileReference
-    file_ref_entry = f'\t\t{file_ref_id} /* {filename} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = {filename}; sourceTree = "<group>"; }};\n'
-
-    file_ref_marker = '/* Begin PBXFileReference section */'
-    idx = content.find(file_ref_marker)
-    if idx != -1:
-        insert_pos = idx + len(file_ref_marker) + 1
-        content = content[:insert_pos] + file_ref_entry + content[insert_pos:]
+    model.file_refs.append(f'\t\t{file_ref_id} /* {filename} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = {filename}; sourceTree = "<group>"; }};\n')
 
     # 3. Add file to parent group's children
     if parent_group_id:
-        content = add_child_to_group(content, parent_group_id, file_ref_id, filename)
+        add_child_to_group(model, parent_group_id, file_ref_id, filename)
 
     # 4. Add PBXBuildFile
-    build_file_entry = f'\t\t{build_file_id} /* {filename} in Sources */ = {{isa = PBXBuildFile; fileRef = {file_ref_id} /* {filename} */; }};\n'
-
-    build_file_marker = '/* Begin PBXBuildFile section */'
-    idx = content.find(build_file_marker)
-    if idx != -1:
-        insert_pos = idx + len(build_file_marker) + 1
-        content = content[:insert_pos] + build_file_entry + content[insert_pos:]
+    model.build_files.append(f'\t\t{build_file_id} /* {filename} in Sources */ = {{isa = PBXBuildFile; fileRef = {file_ref_id} /* {filename} */; }};\n')
 
     # 5. Add to PBXSourcesBuildPhase
-    sources_pattern = r'(/\* Sources \*/ = \{\s*isa = PBXSourcesBuildPhase;[^}]*files = \()([^)]*)\)'
-
-    def sources_replacer(match):
-        prefix = match.group(1)
-        files = match.group(2)
-        new_entry = f'\n\t\t\t\t{build_file_id} /* {filename} in Sources */,'
-        return f'{prefix}{new_entry}{files})'
-
-    content = re.sub(sources_pattern, sources_replacer, content, count=1)
+    model.sources_entries.append(f'\n\t\t\t\t{build_file_id} /* {filename} in Sources */,')
 
-    return content
 
-
-def main():
-    import difflib
+def sync_project(project_name: str, check_only: bool = False, dry_run: bool = False,
+                 show_diff: bool = False, only_pattern: Optional[str] = None,
+                 use_cache: bool = True, out: Optional[TextIO] = None) -> int:
+    """Sync one configured project, printing to out (default stdout). Returns exit status."""
     import fnmatch
 
-    # Parse arguments
-    argv = sys.argv[1:]
-
-    check_only = '--check' in argv
-    dry_run = '--dry-run' in argv
-    show_diff = '--diff' in argv
-
-    # Parse --only pattern
-    only_pattern = None
-    if '--only' in argv:
-        idx = argv.index('--only')
-        if idx + 1 < len(argv):
-            only_pattern = argv[idx + 1]
-            argv = argv[:idx] + argv[idx+2:]  # Remove --only and its value
-
-    # Get positional args (project name)
-    args = [a for a in argv if not a.startswith('-')]
-
-    # Determine project (default to macos)
-    project_name = args[0] if args else 'macos'
-
-    if project_name not in PROJECTS:
-        print(f"Error: Unknown project '{project_name}'")
-        print(f"Available: {', '.join(PROJECTS.keys())}")
-        sys.exit(1)
-
     project_config = PROJECTS[project_name]
     source_dir = project_config['source_dir']
     pbxproj = project_config['pbxproj']
     skip_dirs = project_config.get('skip_dirs', SKIP_DIRS)
 
     if not pbxproj.exists():
-        print(f"Error: {pbxproj} not found")
-        sys.exit(1)
+        print(f"Error: {pbxproj} not found", file=out)
+        return 1
+
+    # Scan the raw bytes first - the project is only decoded if files need adding.
+    # A cached scan of this exact file (same mtime and size) skips even that.
+    stamp = file_stamp(pbxproj.stat())
+    cached = load_cached_project(pbxproj, stamp) if use_cache else None
+    if cached is None:
+        uses_sync, existing_files = scan_pbxproj(pbxproj)
+        cached = {'version': CACHE_VERSION, 'stamp': stamp,
+                  'uses_sync': uses_sync, 'existing_files': existing_files}
+        if use_cache:
+            store_cached_project(pbxproj, cached)
+    uses_sync, existing_files = cached['uses_sync'], cached['existing_files']
+    if uses_sync:
+        print(f"Project uses Xcode file system synchronization.", file=out)
+        print(f"Files in {source_dir.name} are automatically synced by Xcode.", file=out)
+        print(file=out)
+        print("✓ No manual sync needed - just add files to the folder!", file=out)
+        return 0
+
+    print(f"Scanning {project_name.upper()} project: {source_dir}...", file=out)
+    print(file=out)
+
+    missing = find_swift_files(source_dir, skip_dirs, existing_files)
+
+    # Apply --only filter if specified
+    if only_pattern:
+        only_re = re.compile(fnmatch.translate(only_pattern))
+        missing = [rel for rel in missing if only_re.match(rel)]
+
+    if not missing:
+        print("✓ All files in sync", file=out)
+        return 0
+
+    print(f"Missing from project ({len(missing)}):", file=out)
+    print(file=out)
+
+    for rel in missing:
+        print(f"  {rel}", file=out)
+    print(file=out)
+
+    if check_only:
+        print("Run without --check to add them", file=out)
+        return 0
 
     with open(pbxproj, 'r', encoding='utf-8') as f:
         original_content = f.read()
+        unchanged = file_stamp(os.fstat(f.fileno())) == stamp
 
-    # Check if project uses PBXFileSystemSynchronizedRootGroup (Xcode auto-sync)
-    if 'PBXFileSystemSynchronizedRootGroup' in original_content:
-        print(f"Project uses Xcode file system synchronization.")
-        print(f"Files in {source_dir.name} are automatically synced by Xcode.")
-        print()
-        print("✓ No manual sync needed - just add files to the folder!")
-        return
+    # Parse once (or reuse the cached parse), queue every file, then write the
+    # result in a single pass
+    model_state = cached.get('model') if unchanged else None
+    if model_state is not None:
+        model = ProjectModel(content=original_content, **model_state)
+    else:
+        model = load_project(original_content)
+        if use_cache and unchanged:
+            cached['model'] = {name: getattr(model, name) for name in MODEL_CACHE_FIELDS}
+            store_cached_project(pbxproj, cached)
+    for rel_path in missing:
+        add_file_to_project(model, rel_path, project_config)
+    editor = model.editor()
 
-    print(f"Scanning {project_name.upper()} project: {source_dir}...")
-    print()
+    if show_diff:
+        # Show unified diff of just the inserted regions
+        diff_text = editor.build_diff(fromfile='project.pbxproj (before)',
+                                      tofile='project.pbxproj (after)')
+        if diff_text:
+            print("Changes:", file=out)
+            print(diff_text[:3000], file=out)  # Truncate for readability
+            if len(diff_text) > 3000:
+                print(f"  ... ({len(diff_text) - 3000} more characters)", file=out)
+        return 0
 
-    content = original_content
-    existing_files = get_files_in_project(content)
-    all_swift_files = find_swift_files(source_dir, skip_dirs)
+    if dry_run:
+        print("Dry run - no changes made", file=out)
+        print(f"Would add {len(missing)} file(s) to project", file=out)
+        return 0
 
-    missing = []
-    for filepath in all_swift_files:
-        if filepath.name not in existing_files:
-            rel_path = str(filepath.relative_to(source_dir))
-            # Apply --only filter if specified
-            if only_pattern:
-                if not fnmatch.fnmatch(rel_path, only_pattern):
-                    continue
-            missing.append(filepath)
+    content = editor.build()
 
-    if not missing:
-        print("✓ All files in sync")
-        return
+    # Actually write changes - back up the original, write a temp file next to
+    # the project, then swap it in with one rename so project.pbxproj always
+    # exists, whole, at every point
+    backup_path = str(pbxproj) + '.backup'
+    tmp_path = str(pbxproj) + '.tmp'
+    shutil.copy2(pbxproj, backup_path)
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        shutil.copymode(pbxproj, tmp_path)
+        os.replace(tmp_path, pbxproj)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    _cache_path(pbxproj).unlink(missing_ok=True)
+
+    print(f"✓ Added {len(missing)} file(s)", file=out)
+    print(f"  Backup: {backup_path}", file=out)
+    return 0
+
+
+def _sync_buffered(project_name: str, **options) -> Tuple[str, int]:
+    """Run sync_project with its output captured, for concurrent --all runs."""
+    buf = io.StringIO()
+    status = sync_project(project_name, out=buf, **options)
+    return buf.getvalue(), status
 
-    print(f"Missing from project ({len(missing)}):")
-    print()
 
-    for f in missing:
-        rel = f.relative_to(source_dir)
-        print(f"  {rel}")
-    print()
+def main():
+    # Parse arguments
+    argv = sys.argv[1:]
 
-    if check_only:
-        print("Run without --check to add them")
-        return
+    options = {
+        'check_only': '--check' in argv,
+        'dry_run': '--dry-run' in argv,
+        'show_diff': '--diff' in argv,
+        'use_cache': '--no-cache' not in argv,
+    }
+    run_all = '--all' in argv
 
-    # Process all files
-    for filepath in missing:
-        content = add_file_to_project(content, filepath, source_dir, project_config)
+    # Parse --only pattern
+    if '--only' in argv:
+        idx = argv.index('--only')
+        if idx + 1 < len(argv):
+            options['only_pattern'] = argv[idx + 1]
+            argv = argv[:idx] + argv[idx+2:]  # Remove --only and its value
 
-    if show_diff:
-        # Show unified diff
-        orig_lines = original_content.splitlines(keepends=True)
-        new_lines = content.splitlines(keepends=True)
-        diff = difflib.unified_diff(orig_lines, new_lines,
-                                     fromfile='project.pbxproj (before)',
-                                     tofile='project.pbxproj (after)')
-        diff_text = ''.join(diff)
-        if diff_text:
-            print("Changes:")
-            print(diff_text[:3000])  # Truncate for readability
-            if len(diff_text) > 3000:
-                print(f"  ... ({len(diff_text) - 3000} more characters)")
+    if run_all:
+        # Projects have disjoint trees and pbxproj files - scan them concurrently,
+        # then print each project's buffered output in config order
+        with ThreadPoolExecutor(max_workers=len(PROJECTS)) as pool:
+            futures = [pool.submit(_sync_buffered, name, **options) for name in PROJECTS]
+        status = 0
+        for i, future in enumerate(futures):
+            output, project_status = future.result()
+            if i:
+                print()
+            print(output, end='')
+            status = status or project_status
+        if status:
+            sys.exit(status)
         return
 
-    if dry_run:
-        print("Dry run - no changes made")
-        print(f"Would add {len(missing)} file(s) to project")
-        return
+    # Get positional args (project name)
+    args = [a for a in argv if not a.startswith('-')]
 
-    # Actually write changes
-    backup_path = str(pbxproj) + '.backup'
-    shutil.copy(pbxproj, backup_path)
+    # Determine project (default to macos)
+    project_name = args[0] if args else 'macos'
 
-    with open(pbxproj, 'w', encoding='utf-8') as f:
-        f.write(content)
+    if project_name not in PROJECTS:
+        print(f"Error: Unknown project '{project_name}'")
+        print(f"Available: {', '.join(PROJECTS.keys())}")
+        sys.exit(1)
 
-    print(f"✓ Added {len(missing)} file(s)")
-    print(f"  Backup: {backup_path}")
+    status = sync_project(project_name, **options)
+    if status:
+        sys.exit(status)
 
 
 if __name__ == '__main__':
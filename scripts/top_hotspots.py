@@ -7,86 +7,159 @@ using atos, and ranks functions by sample count.
 
 Usage:
     top_hotspots.py --samples /tmp/samples.xml --binary /path/to/App --load-address 0x100000000 --top 30
+
+Symbolication results are cached in ~/.cache/talkie/symcache, keyed by the
+binary (mtime + size), load address and address set; --no-cache skips it.
 """
 
 import argparse
+import hashlib
+import json
+import os
 import re
 import subprocess
 import sys
+import tempfile
+import threading
 import xml.etree.ElementTree as ET
 from collections import Counter
-from dataclasses import dataclass
 from pathlib import Path
 
+# Hex addresses in backtrace fields / frame attributes
+_HEX_RE = re.compile(r"0x[0-9a-fA-F]+")
+
+# Symbol clean-up: trailing "(file.c:123)", "+ offset" and "(in Module)"
+_FILE_LINE_RE = re.compile(r"\s+\([^)]+:\d+\)$")
+_OFFSET_RE = re.compile(r"\s+\+\s+\d+$")
+_MODULE_RE = re.compile(r"\s+\(in [^)]+\)$")
+
+# Widest hotspot bar (100% at two percent per block); rows slice it
+FULL_BAR = "█" * 50
+
+# Bytes of address text written to atos per pipe write
+ATOS_CHUNK = 4096
 
-@dataclass
-class Sample:
-    """A single time sample with backtrace addresses."""
-    addresses: list[int]
-    weight: int = 1
+# Persistent address -> symbol maps from earlier atos runs
+SYMBOL_CACHE_DIR = Path.home() / ".cache" / "talkie" / "symcache"
 
 
-def parse_samples_xml(xml_path: str) -> list[Sample]:
-    """Parse time samples from exported XML."""
-    samples = []
+def parse_samples_xml(xml_path: str) -> tuple[Counter[int], int]:
+    """Parse time samples from exported XML.
+
+    Streams the file with iterparse and drops each row once it has been read,
+    so memory stays flat however large the export is. Samples are folded into
+    per-address weights as they are read; returns (weights, sample_count).
+    """
+    addr_weights: Counter[int] = Counter()
+    sample_count = 0
+    # Bare <frame> addresses (one sample each), used only if no row has data
+    frame_weights: Counter[int] = Counter()
+    frame_count = 0
 
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+        # Look for sample/backtrace data in various possible formats
+        # xctrace export format can vary
+        open_elements = []
+        for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+            if event == "start":
+                open_elements.append(elem)
+                continue
+            open_elements.pop()
+
+            if elem.tag == "row":
+                # Try to find rows with backtrace data
+                addresses = []
+                weight = 1
+
+                for child in elem:
+                    # Look for address/backtrace fields
+                    tag = child.tag.lower()
+                    text = child.text or ""
+
+                    if "backtrace" in tag or "stack" in tag or "address" in tag:
+                        # Parse addresses from the field
+                        # Could be hex addresses separated by spaces/commas
+                        # (every _HEX_RE match is valid hex, so int() can't fail)
+                        addresses += [int(match, 16) for match in _HEX_RE.findall(text)]
+
+                    if "weight" in tag or "count" in tag or "sample" in tag:
+                        try:
+                            weight = int(text)
+                        except ValueError:
+                            pass
+
+                if addresses:
+                    sample_count += 1
+                    if weight == 1:
+                        addr_weights.update(addresses)
+                    else:
+                        for addr in addresses:
+                            addr_weights[addr] += weight
+
+                # Free the finished row and its already-read siblings
+                elem.clear()
+                if open_elements:
+                    del open_elements[-1][:]
+
+            elif elem.tag == "frame" and not sample_count:
+                # Also try looking for frame elements directly
+                addr_text = elem.get("addr") or elem.get("address") or elem.text or ""
+                matches = _HEX_RE.findall(addr_text)
+                frame_weights.update(int(match, 16) for match in matches)
+                frame_count += len(matches)
     except ET.ParseError as e:
         print(f"Error parsing XML: {e}", file=sys.stderr)
-        return samples
-
-    # Look for sample/backtrace data in various possible formats
-    # xctrace export format can vary
-
-    # Try to find rows with backtrace data
-    for row in root.iter("row"):
-        addresses = []
-        weight = 1
-
-        for child in row:
-            # Look for address/backtrace fields
-            tag = child.tag.lower()
-            text = child.text or ""
-
-            if "backtrace" in tag or "stack" in tag or "address" in tag:
-                # Parse addresses from the field
-                # Could be hex addresses separated by spaces/commas
-                for match in re.findall(r"0x[0-9a-fA-F]+", text):
-                    try:
-                        addresses.append(int(match, 16))
-                    except ValueError:
-                        pass
-
-            if "weight" in tag or "count" in tag or "sample" in tag:
-                try:
-                    weight = int(text)
-                except ValueError:
-                    pass
-
-        if addresses:
-            samples.append(Sample(addresses=addresses, weight=weight))
-
-    # Also try looking for frame elements directly
-    if not samples:
-        for frame in root.iter("frame"):
-            addr_text = frame.get("addr") or frame.get("address") or frame.text or ""
-            for match in re.findall(r"0x[0-9a-fA-F]+", addr_text):
-                try:
-                    samples.append(Sample(addresses=[int(match, 16)], weight=1))
-                except ValueError:
-                    pass
-
-    return samples
+        return Counter(), 0
+
+    if sample_count:
+        return addr_weights, sample_count
+    return frame_weights, frame_count
+
+
+def symbol_cache_path(binary_path: str, load_address: int, addresses: list[int]) -> Path | None:
+    """Cache file for this exact binary build, load address and address set."""
+    try:
+        st = os.stat(binary_path)
+    except OSError:
+        return None
+    key = hashlib.sha256()
+    key.update(f"{os.path.realpath(binary_path)}\0{st.st_mtime_ns}\0{st.st_size}\0{load_address}\0".encode())
+    key.update(" ".join(map(hex, sorted(addresses))).encode())
+    return SYMBOL_CACHE_DIR / f"{key.hexdigest()}.json"
+
+
+def load_cached_symbols(cache_file: Path) -> dict[int, str] | None:
+    """Read a cached address -> symbol map, or None if missing or unreadable."""
+    try:
+        cached = json.loads(cache_file.read_text())
+        return {int(addr, 16): symbol for addr, symbol in cached.items()}
+    except (OSError, ValueError, AttributeError, TypeError):
+        return None
+
+
+def store_cached_symbols(cache_file: Path, symbols: dict[int, str]) -> None:
+    """Write an address -> symbol map atomically; failures are ignored."""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({hex(addr): symbol for addr, symbol in symbols.items()}, f)
+        os.replace(tmp_name, cache_file)
+    except OSError:
+        pass  # The cache is only an optimization
 
 
 def symbolicate_addresses(
     addresses: set[int],
     binary_path: str,
-    load_address: int
+    load_address: int,
+    use_cache: bool = True
 ) -> dict[int, str]:
-    """Symbolicate addresses using atos."""
+    """Symbolicate addresses using atos.
+
+    A previous run's results for the same binary, load address and address
+    set are reused from SYMBOL_CACHE_DIR, skipping atos entirely.
+    """
     if not addresses:
         return {}
 
@@ -102,29 +175,55 @@ def symbolicate_addresses(
         print(f"Warning: No addresses in range of load address {hex(load_address)}", file=sys.stderr)
         return {}
 
-    # Run atos in batch mode
-    addr_args = [hex(a) for a in filtered]
-
-    result = subprocess.run(
-        ["atos", "-o", binary_path, "-l", hex(load_address)] + addr_args,
-        capture_output=True,
-        text=True,
-    )
-
-    if result.returncode != 0:
-        print(f"atos error: {result.stderr}", file=sys.stderr)
-        return {}
-
-    # Parse atos output - one line per address
-    symbols = {}
-    lines = result.stdout.strip().split("\n")
-    for addr, line in zip(filtered, lines):
-        # Clean up the symbol name
-        symbol = line.strip()
-        if symbol and symbol != hex(addr):
-            symbols[addr] = symbol
-        else:
-            symbols[addr] = f"<unknown {hex(addr)}>"
+    cache_file = symbol_cache_path(binary_path, load_address, filtered) if use_cache else None
+    if cache_file is not None:
+        cached = load_cached_symbols(cache_file)
+        if cached is not None:
+            return cached
+
+    # Run atos in batch mode, feeding addresses on stdin (no argv size limit)
+    # from a writer thread while this thread reads symbols back as they come.
+    # stderr goes to a temp file so a chatty atos can't fill a pipe and stall.
+    with tempfile.TemporaryFile(mode="w+") as err:
+        proc = subprocess.Popen(
+            ["atos", "-o", binary_path, "-l", hex(load_address)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=err,
+            text=True,
+        )
+
+        def feed() -> None:
+            text = "".join(f"{hex(a)}\n" for a in filtered)
+            try:
+                for start in range(0, len(text), ATOS_CHUNK):
+                    proc.stdin.write(text[start:start + ATOS_CHUNK])
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass  # atos exited early; its return code reports why
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+
+        # Parse atos output - one line per address
+        symbols = {}
+        for addr, line in zip(filtered, proc.stdout):
+            # Clean up the symbol name
+            symbol = line.strip()
+            if symbol and symbol != hex(addr):
+                symbols[addr] = symbol
+            else:
+                symbols[addr] = f"<unknown {hex(addr)}>"
+        proc.stdout.read()  # drain anything past the last address
+        writer.join()
+
+        if proc.wait() != 0:
+            err.seek(0)
+            print(f"atos error: {err.read()}", file=sys.stderr)
+            return {}
+
+    if cache_file is not None:
+        store_cached_symbols(cache_file, symbols)
 
     return symbols
 
@@ -135,34 +234,41 @@ def extract_function_name(symbol: str) -> str:
     # Handle C-style: "function_name (in library) (file.c:123)"
 
     # Remove file/line info in parentheses at the end
-    symbol = re.sub(r"\s+\([^)]+:\d+\)$", "", symbol)
+    symbol = _FILE_LINE_RE.sub("", symbol)
 
     # Remove offset
-    symbol = re.sub(r"\s+\+\s+\d+$", "", symbol)
+    symbol = _OFFSET_RE.sub("", symbol)
 
     # Remove module info like "(in ModuleName)"
-    symbol = re.sub(r"\s+\(in [^)]+\)$", "", symbol)
+    symbol = _MODULE_RE.sub("", symbol)
 
     return symbol.strip()
 
 
 def analyze_hotspots(
-    samples: list[Sample],
+    addr_weights: Counter[int],
     symbols: dict[int, str],
     binary_name: str,
     top_n: int = 30
 ) -> list[tuple[str, int]]:
-    """Analyze samples and return top hotspots."""
+    """Analyze per-address sample weights and return top hotspots."""
     function_counts: Counter[str] = Counter()
 
-    for sample in samples:
-        for addr in sample.addresses:
-            if addr in symbols:
-                symbol = symbols[addr]
-                # Only count our app's symbols (not system frameworks)
-                if binary_name.lower() in symbol.lower() or "(in " not in symbol:
-                    func_name = extract_function_name(symbol)
-                    function_counts[func_name] += sample.weight
+    # Resolve each symbolicated address to a function name once, rather than
+    # filtering and cleaning the symbol for every address. Names are interned
+    # so the many addresses inside one function share a single key object.
+    # Only count our app's symbols (not system frameworks)
+    binary_lower = binary_name.lower()
+    func_by_addr = {
+        addr: sys.intern(extract_function_name(symbol))
+        for addr, symbol in symbols.items()
+        if binary_lower in symbol.lower() or "(in " not in symbol
+    }
+
+    for addr, weight in addr_weights.items():
+        func_name = func_by_addr.get(addr)
+        if func_name is not None:
+            function_counts[func_name] += weight
 
     return function_counts.most_common(top_n)
 
@@ -197,6 +303,11 @@ def main():
         action="store_true",
         help="Show raw addresses without symbolication"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always run atos instead of reusing cached symbols"
+    )
 
     args = parser.parse_args()
 
@@ -222,42 +333,32 @@ def main():
     binary_name = Path(args.binary).stem
 
     print(f"Parsing samples from: {args.samples}")
-    samples = parse_samples_xml(args.samples)
+    addr_weights, sample_count = parse_samples_xml(args.samples)
 
-    if not samples:
+    if not sample_count:
         print("No samples found in file. The XML format may not be supported.")
         print("\nTry opening the .trace in Instruments and manually exporting.")
         sys.exit(1)
 
-    print(f"Found {len(samples)} samples")
-
-    # Collect all unique addresses
-    all_addresses: set[int] = set()
-    for sample in samples:
-        all_addresses.update(sample.addresses)
-
-    print(f"Found {len(all_addresses)} unique addresses")
+    print(f"Found {sample_count} samples")
+    print(f"Found {len(addr_weights)} unique addresses")
 
     if args.raw:
         # Just show raw address counts
-        addr_counts: Counter[int] = Counter()
-        for sample in samples:
-            for addr in sample.addresses:
-                addr_counts[addr] += sample.weight
-
         print(f"\nTop {args.top} addresses by sample count:")
         print("-" * 60)
-        for addr, count in addr_counts.most_common(args.top):
-            print(f"  {hex(addr):20}  {count:>6} samples")
+        sys.stdout.write("".join(f"  {hex(addr):20}  {count:>6} samples\n"
+                                 for addr, count in addr_weights.most_common(args.top)))
         return
 
     print(f"\nSymbolicating with binary: {args.binary}")
     print(f"Load address: {hex(load_address)}")
 
-    symbols = symbolicate_addresses(all_addresses, args.binary, load_address)
+    symbols = symbolicate_addresses(set(addr_weights), args.binary, load_address,
+                                    use_cache=not args.no_cache)
     print(f"Symbolicated {len(symbols)} addresses")
 
-    hotspots = analyze_hotspots(samples, symbols, binary_name, args.top)
+    hotspots = analyze_hotspots(addr_weights, symbols, binary_name, args.top)
 
     if not hotspots:
         print("\nNo hotspots found in your app's code.")
@@ -270,13 +371,14 @@ def main():
     print(f"\nTop {len(hotspots)} hotspots in {binary_name}:")
     print("=" * 80)
 
+    # Build the whole table and write it once rather than three prints a row
     total_samples = sum(count for _, count in hotspots)
+    lines = []
     for i, (func, count) in enumerate(hotspots, 1):
         pct = (count / total_samples) * 100 if total_samples > 0 else 0
-        bar = "█" * int(pct / 2)
-        print(f"{i:3}. {count:>6} ({pct:5.1f}%) {bar}")
-        print(f"     {func}")
-        print()
+        bar = FULL_BAR[:int(pct / 2)]
+        lines.append(f"{i:3}. {count:>6} ({pct:5.1f}%) {bar}\n     {func}\n\n")
+    sys.stdout.write("".join(lines))
 
 
 if __name__ == "__main__":
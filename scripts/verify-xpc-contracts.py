@@ -8,17 +8,29 @@ then verifies implementations match across the codebase.
 Usage:
     ./scripts/verify-xpc-contracts.py           # Verify contracts
     ./scripts/verify-xpc-contracts.py --rebuild # Rebuild symbolgraphs first
+
+Parsed symbol-graph methods are cached in /tmp/talkie-symbolgraph/.cache and
+reused until DerivedData changes; --rebuild always re-extracts.
 """
 
 import os
 import re
 import sys
 import json
+import bisect
 import hashlib
+import functools
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+# ijson is optional; it streams large symbol graphs instead of loading them whole
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # ANSI colors
 RED = "\033[91m"
 GREEN = "\033[92m"
@@ -29,6 +41,15 @@ RESET = "\033[0m"
 BOLD = "\033[1m"
 DIM = "\033[2m"
 
+# Swift func declarations inside a protocol body: name and parameter list
+FUNC_RE = re.compile(r'func\s+(\w+)\s*\(([^)]*)\)')
+# Characters that matter when splitting a parameter list at top-level commas
+PARAM_PUNCT_RE = re.compile(r'[<(\[>)\],]')
+NEWLINE_RE = re.compile('\n')
+
+# Bump when the cached symbol-graph method format changes
+SYMBOLGRAPH_CACHE_VERSION = 1
+
 def get_repo_root() -> Path:
     """Get the repository root directory."""
     script_dir = Path(__file__).parent
@@ -59,6 +80,12 @@ def find_all_derived_data() -> list[Path]:
 
     return results
 
+@functools.lru_cache(maxsize=None)
+def get_sdk_path() -> str:
+    """Get the active macOS SDK path (asked of xcrun once per run)."""
+    sdk_result = subprocess.run(["xcrun", "--show-sdk-path"], capture_output=True, text=True)
+    return sdk_result.stdout.strip()
+
 def extract_symbolgraph(module_name: str, derived_data_paths: list[Path], output_dir: Path) -> Optional[Path]:
     """Extract symbol graph for a module using Xcode tools.
 
@@ -67,9 +94,7 @@ def extract_symbolgraph(module_name: str, derived_data_paths: list[Path], output
     output_dir.mkdir(parents=True, exist_ok=True)
     output_file = output_dir / f"{module_name}.symbols.json"
 
-    # Get SDK path
-    sdk_result = subprocess.run(["xcrun", "--show-sdk-path"], capture_output=True, text=True)
-    sdk_path = sdk_result.stdout.strip()
+    sdk_path = get_sdk_path()
 
     # Build -I flags for all derived data paths
     include_flags = []
@@ -92,30 +117,177 @@ def extract_symbolgraph(module_name: str, derived_data_paths: list[Path], output
     return output_file if output_file.exists() else None
 
 def parse_protocol_methods(symbolgraph_path: Path, protocol_name: str) -> list[dict]:
-    """Extract method signatures from a protocol in the symbol graph."""
-    with open(symbolgraph_path) as f:
-        data = json.load(f)
+    """Extract method signatures from a protocol in the symbol graph.
 
-    symbols = data.get('symbols', [])
+    With ijson installed the symbols array is streamed one symbol at a time;
+    otherwise the whole graph is loaded with json.
+    """
     methods = []
 
-    for sym in symbols:
-        path = sym.get('pathComponents', [])
-        if protocol_name in path and sym.get('kind', {}).get('identifier') == 'swift.method':
-            name = sym['names']['title']
-            # Get full declaration
-            decl_frags = sym.get('declarationFragments', [])
-            decl = ''.join([f['spelling'] for f in decl_frags])
-            methods.append({
-                'name': name,
-                'declaration': decl,
-                'identifier': sym.get('identifier', {}).get('precise', '')
-            })
+    with open(symbolgraph_path, 'rb') as f:
+        if ijson is not None:
+            symbols = ijson.items(f, 'symbols.item')
+        else:
+            symbols = json.load(f).get('symbols', [])
+
+        for sym in symbols:
+            path = sym.get('pathComponents', [])
+            if protocol_name in path and sym.get('kind', {}).get('identifier') == 'swift.method':
+                name = sym['names']['title']
+                # Get full declaration
+                decl_frags = sym.get('declarationFragments', [])
+                decl = ''.join([f['spelling'] for f in decl_frags])
+                methods.append({
+                    'name': name,
+                    'declaration': decl,
+                    'identifier': sym.get('identifier', {}).get('precise', '')
+                })
 
     return sorted(methods, key=lambda m: m['name'])
 
+def module_file_stamps(module_name: str, paths: list[Path]) -> list[str]:
+    """Path, mtime (ns) and size of every file swift-symbolgraph-extract could
+    load for module_name from the -I paths.
+
+    That is a bare or directory X.swiftmodule, or X.framework/Modules/X.swiftmodule,
+    with every .swiftmodule/.swiftinterface/.swiftdoc inside it.
+    """
+    stamps = []
+    for path in paths:
+        for module in (path / f"{module_name}.swiftmodule",
+                       path / f"{module_name}.framework" / "Modules" / f"{module_name}.swiftmodule"):
+            if module.is_dir():
+                files = sorted(Path(root) / name for root, _, names in os.walk(module) for name in names)
+            else:
+                files = [module]
+            for file in files:
+                try:
+                    st = file.stat()
+                except OSError:
+                    continue
+                stamps.append(f"{file}:{st.st_mtime_ns}:{st.st_size}")
+    return stamps
+
+def load_protocol_methods(module_name: str, protocol_name: str, derived_data_paths: list[Path],
+                          output_dir: Path, rebuild: bool = False) -> Optional[list[dict]]:
+    """Protocol methods from a module's symbol graph, or None if extraction fails.
+
+    Parsed methods are cached in output_dir/.cache, keyed on the module,
+    protocol, SDK and the mtime and size of each of the module's
+    .swiftmodule/.swiftinterface files, so an unchanged build skips
+    swift-symbolgraph-extract entirely. rebuild ignores the cache.
+    """
+    key_parts = [str(SYMBOLGRAPH_CACHE_VERSION), module_name, protocol_name, get_sdk_path(),
+                 *map(str, derived_data_paths), *module_file_stamps(module_name, derived_data_paths)]
+    cache_key = hashlib.sha256("\0".join(key_parts).encode()).hexdigest()
+    cache_file = output_dir / ".cache" / f"{cache_key}.json"
+
+    if not rebuild:
+        try:
+            return json.loads(cache_file.read_text())
+        except (OSError, ValueError):
+            pass
+
+    sg_file = extract_symbolgraph(module_name, derived_data_paths, output_dir)
+    if not sg_file:
+        return None
+    methods = parse_protocol_methods(sg_file, protocol_name)
+
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(methods))
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass  # The cache is only an optimization
+
+    return methods
+
+@functools.lru_cache(maxsize=None)
+def protocol_patterns(protocol_name: str) -> dict[str, re.Pattern]:
+    """Compiled per-protocol patterns, built once per protocol name.
+
+    The per-line patterns ('conformance', 'proxy', 'interface') only allow
+    horizontal whitespace, so a match never crosses a newline; that lets them
+    run over a whole file while still meaning "somewhere on one line".
+    """
+    return {
+        'definition': re.compile(rf'protocol\s+{protocol_name}\s*[{{:]'),
+        'inherits': re.compile(rf':\s*.*{protocol_name}'),
+        'conformance': re.compile(rf'(class|struct|final class)[^\S\n]+\w+.*:[^\S\n]*.*{protocol_name}'),
+        'proxy': re.compile(rf':[^\S\n]*{protocol_name}\??'),
+        'interface': re.compile(re.escape(f'NSXPCInterface(with: {protocol_name}.self)')),
+        'objc_block': re.compile(rf'@objc\s+public\s+protocol\s+{protocol_name}\s*\{{'),
+        'block': re.compile(rf'protocol\s+{protocol_name}\s*\{{'),
+    }
+
+def matching_lines(pattern: re.Pattern, content: str, newlines: list[int]):
+    """Yield (line number, line start) of each line with a match, once per line.
+
+    `newlines` holds the offset of every newline in content, so line numbers
+    come from a bisect rather than splitting the file into lines.
+    """
+    last_line = 0
+    for m in pattern.finditer(content):
+        index = bisect.bisect_left(newlines, m.start())
+        if index + 1 != last_line:
+            last_line = index + 1
+            yield last_line, (newlines[index - 1] + 1 if index else 0)
+
+def _scan_one_file(file: Path, repo_root: Path, protocol_name: str) -> dict:
+    """Scan one Swift file for protocol usages, keyed like find_protocol_usages."""
+    usages = {
+        'definitions': [],
+        'conformances': [],
+        'interface_uses': [],
+        'proxy_types': [],
+    }
+    patterns = protocol_patterns(protocol_name)
+
+    try:
+        # Every pattern needs the protocol name, so skip files without it
+        # before paying for decoding or any regex work.
+        data = file.read_bytes()
+        if protocol_name.encode() not in data:
+            return usages
+        content = data.decode('utf-8')
+        if '\r' in content:
+            # Match read_text()'s universal newlines so line numbers agree
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        rel_path = file.relative_to(repo_root)
+        newlines = [m.start() for m in NEWLINE_RE.finditer(content)]
+
+        # Find protocol definition
+        if patterns['definition'].search(content):
+            usages['definitions'].append(str(rel_path))
+
+        # Find conformances (class/struct : Protocol)
+        first_use = content.find(protocol_name)
+        if patterns['inherits'].search(content) and 'protocol ' not in content[max(0, first_use - 50):first_use]:
+            for i, _ in matching_lines(patterns['conformance'], content, newlines):
+                usages['conformances'].append(f"{rel_path}:{i}")
+
+        # Find NSXPCInterface uses
+        for i, _ in matching_lines(patterns['interface'], content, newlines):
+            usages['interface_uses'].append(f"{rel_path}:{i}")
+
+        # Find proxy variables
+        for i, start in matching_lines(patterns['proxy'], content, newlines):
+            end = content.find('\n', start)
+            if 'protocol' not in content[start:end if end >= 0 else len(content)]:
+                usages['proxy_types'].append(f"{rel_path}:{i}")
+
+    except Exception:
+        pass
+
+    return usages
+
 def find_protocol_usages(repo_root: Path, protocol_name: str) -> dict:
-    """Find all usages of a protocol in the codebase."""
+    """Find all usages of a protocol in the codebase.
+
+    Files are read and scanned in worker processes (the regex work holds the
+    GIL, so threads wouldn't help); results are merged in glob order.
+    """
     usages = {
         'definitions': [],      # Where protocol is defined
         'conformances': [],     # Types that conform to protocol
@@ -124,34 +296,19 @@ def find_protocol_usages(repo_root: Path, protocol_name: str) -> dict:
     }
 
     swift_files = list(repo_root.glob("apps/macos/**/*.swift"))
+    scan = functools.partial(_scan_one_file, repo_root=repo_root, protocol_name=protocol_name)
+    workers = min(os.cpu_count() or 1, len(swift_files))
 
-    for file in swift_files:
-        try:
-            content = file.read_text()
-            rel_path = file.relative_to(repo_root)
-
-            # Find protocol definition
-            if re.search(rf'protocol\s+{protocol_name}\s*[{{:]', content):
-                usages['definitions'].append(str(rel_path))
-
-            # Find conformances (class/struct : Protocol)
-            if re.search(rf':\s*.*{protocol_name}', content) and 'protocol ' not in content.split(protocol_name)[0][-50:]:
-                for i, line in enumerate(content.split('\n'), 1):
-                    if re.search(rf'(class|struct|final class)\s+\w+.*:\s*.*{protocol_name}', line):
-                        usages['conformances'].append(f"{rel_path}:{i}")
-
-            # Find NSXPCInterface uses
-            for i, line in enumerate(content.split('\n'), 1):
-                if f'NSXPCInterface(with: {protocol_name}.self)' in line:
-                    usages['interface_uses'].append(f"{rel_path}:{i}")
-
-            # Find proxy variables
-            for i, line in enumerate(content.split('\n'), 1):
-                if re.search(rf':\s*{protocol_name}\??', line) and 'protocol' not in line:
-                    usages['proxy_types'].append(f"{rel_path}:{i}")
+    if workers > 1:
+        chunksize = max(1, len(swift_files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(scan, swift_files, chunksize=chunksize))
+    else:
+        results = map(scan, swift_files)
 
-        except Exception:
-            continue
+    for partial in results:
+        for key, found in partial.items():
+            usages[key].extend(found)
 
     return usages
 
@@ -161,6 +318,29 @@ def compute_method_hash(methods: list[dict]) -> str:
     return hashlib.sha256(sig.encode()).hexdigest()[:12]
 
 
+def split_params(params_str: str) -> list[str]:
+    """Split a parameter list by comma, handling nested generics.
+
+    Only brackets and commas are visited (via PARAM_PUNCT_RE), not every
+    character of the list.
+    """
+    params = []
+    depth = 0
+    last = 0
+    for match in PARAM_PUNCT_RE.finditer(params_str):
+        char = match.group()
+        if char in '<([':
+            depth += 1
+        elif char in '>)]':
+            depth -= 1
+        elif depth == 0:
+            params.append(params_str[last:match.start()].strip())
+            last = match.end()
+    tail = params_str[last:].strip()
+    if tail:
+        params.append(tail)
+    return params
+
 def extract_methods_from_source(file_path: Path, protocol_name: str) -> list[dict]:
     """Extract method signatures from Swift source file.
 
@@ -171,59 +351,47 @@ def extract_methods_from_source(file_path: Path, protocol_name: str) -> list[dic
     methods = []
 
     # Find protocol block
-    pattern = rf'@objc\s+public\s+protocol\s+{protocol_name}\s*\{{'
-    match = re.search(pattern, content)
+    patterns = protocol_patterns(protocol_name)
+    match = patterns['objc_block'].search(content)
     if not match:
-        pattern = rf'protocol\s+{protocol_name}\s*\{{'
-        match = re.search(pattern, content)
+        match = patterns['block'].search(content)
 
     if not match:
         return methods
 
     # Extract content between braces
+    # (jump between braces with str.find rather than walking every character)
     start = match.end()
     brace_count = 1
     end = start
 
-    for i, char in enumerate(content[start:], start):
-        if char == '{':
+    pos = start
+    next_open = content.find('{', start)
+    while True:
+        close = content.find('}', pos)
+        if close == -1:
+            break
+        while next_open != -1 and next_open < close:
             brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0:
-                end = i
-                break
+            next_open = content.find('{', next_open + 1)
+        brace_count -= 1
+        if brace_count == 0:
+            end = close
+            break
+        pos = close + 1
 
     protocol_body = content[start:end]
 
     # Parse func declarations with full parameter list
     # Match: func name(param1: Type, param2: Type, ...)
-    func_pattern = r'func\s+(\w+)\s*\(([^)]*)\)'
-    for match in re.finditer(func_pattern, protocol_body):
+    for match in FUNC_RE.finditer(protocol_body):
         func_name = match.group(1)
         params_str = match.group(2)
 
         # Parse parameters to build selector
         selector_parts = []
         if params_str.strip():
-            # Split by comma, handling nested generics
-            params = []
-            depth = 0
-            current = ""
-            for char in params_str:
-                if char in '<([':
-                    depth += 1
-                elif char in '>)]':
-                    depth -= 1
-                if char == ',' and depth == 0:
-                    params.append(current.strip())
-                    current = ""
-                else:
-                    current += char
-            if current.strip():
-                params.append(current.strip())
-
-            for param in params:
+            for param in split_params(params_str):
                 # Extract external parameter name (before internal name or colon)
                 # e.g., "audioPath: String" -> "audioPath"
                 # e.g., "_ modelId: String" -> "_"
@@ -283,9 +451,9 @@ def main():
     if derived_paths:
         print(f"\n{BLUE}Extracting symbol graphs...{RESET}")
         for module in ["TalkieKit", "TalkieEngine"]:
-            sg_file = extract_symbolgraph(module, derived_paths, symbolgraph_dir)
-            if sg_file:
-                methods = parse_protocol_methods(sg_file, "TalkieEngineProtocol")
+            methods = load_protocol_methods(module, "TalkieEngineProtocol", derived_paths,
+                                            symbolgraph_dir, rebuild=rebuild)
+            if methods is not None:
                 if methods:
                     protocol_methods[module] = methods
                     print(f"  {GREEN}✓{RESET} {module}: {len(methods)} methods")
@@ -342,8 +510,7 @@ def main():
             print(f"{GREEN}✓{RESET} All protocol definitions match ({list(unique_hashes)[0]})")
             first_methods = list(all_methods.values())[0]
             print(f"\n{BOLD}Methods ({len(first_methods)}):{RESET}")
-            for m in first_methods:
-                print(f"  • {m['name']}")
+            sys.stdout.write("".join(f"  • {m['name']}\n" for m in first_methods))
             return 0
         else:
             print(f"{RED}✗{RESET} MISMATCH DETECTED!")
@@ -357,20 +524,20 @@ def main():
                 all_method_names.update(m['name'] for m in methods)
 
             print(f"\n{YELLOW}Method comparison:{RESET}")
+            names_by_module = {module: {m['name'] for m in methods} for module, methods in all_methods.items()}
+            lines = []
             for method in sorted(all_method_names):
-                status = []
-                for module, methods in all_methods.items():
-                    has_it = any(m['name'] == method for m in methods)
-                    status.append(f"{module}:{'✓' if has_it else '✗'}")
-                print(f"  {method}: {', '.join(status)}")
+                status = [f"{module}:{'✓' if method in names else '✗'}"
+                          for module, names in names_by_module.items()]
+                lines.append(f"  {method}: {', '.join(status)}\n")
+            sys.stdout.write("".join(lines))
 
             return 1
     elif len(all_methods) == 1:
         name, methods = list(all_methods.items())[0]
         print(f"{GREEN}✓{RESET} Single definition found: {name}")
         print(f"\n{BOLD}Methods ({len(methods)}):{RESET}")
-        for m in methods:
-            print(f"  • {m['name']}")
+        sys.stdout.write("".join(f"  • {m['name']}\n" for m in methods))
         return 0
     else:
         print(f"{YELLOW}⚠{RESET} No protocol methods extracted")
@@ -18,12 +18,27 @@ Usage:
 
     # Analyze specific screens only
     python3 scripts/vlm-audit-screens.py --screens "settings-*,memos-*"
+
+    # Ignore cached results from earlier runs
+    python3 scripts/vlm-audit-screens.py --refresh
+
+    # Keep more requests in flight
+    python3 scripts/vlm-audit-screens.py --jobs 8
+
+    # Try the first few screens before a full run
+    python3 scripts/vlm-audit-screens.py --limit 5
+
+    # Write one .vlm-analysis.txt per screenshot instead of analyses.ndjson
+    python3 scripts/vlm-audit-screens.py --per-file
 """
 
 import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import json
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import subprocess
 
 # Import analyze_ui functions
@@ -31,12 +46,36 @@ sys.path.insert(0, str(Path(__file__).parent))
 from analyze_ui import (
     analyze_image_with_vlm,
     check_vlm_health,
-    parse_json_from_response,
-    DEFAULT_PROMPT
+    evict_vlm_cache,
+    get_screenshots,
+    json_dump,
+    json_dumps,
+    load_cached_vlm_result,
+    record_vlm_result,
+    store_cached_vlm_result,
+    vlm_cache_key,
+    BAR,
+    DASH,
+    DEFAULT_JOBS,
+    DEFAULT_PROMPT,
+    VLM_CACHE_DIR
 )
 
 AUDIT_BASE = Path.home() / "Desktop" / "talkie-audit"
 
+# Longest screenshot edge sent to the VLM (needs Pillow; 0 sends full size)
+DEFAULT_MAX_EDGE = 1024
+
+# All successful analyses, one {"stem", "analysis"} object per line
+ANALYSES_FILE = "analyses.ndjson"
+
+# Consecutive failed screenshots before the VLM service is probed again; if
+# it is down, the remaining screenshots fail fast instead of each timing out
+CIRCUIT_BREAKER_FAILURES = 3
+# Health probes (2s, 4s, 8s apart) before the service is treated as down
+CIRCUIT_BREAKER_PROBES = 3
+CIRCUIT_OPEN_ERROR = "circuit_open"
+
 def find_latest_audit_run() -> Optional[Path]:
     """Find the latest audit run directory."""
     if not AUDIT_BASE.exists():
@@ -45,139 +84,176 @@ def find_latest_audit_run() -> Optional[Path]:
     runs = sorted(AUDIT_BASE.glob("run-*"), reverse=True)
     return runs[0] if runs else None
 
-def get_screenshots(audit_dir: Path, pattern: str = "*.png") -> List[Path]:
-    """Get all screenshots from audit directory."""
-    screenshots_dir = audit_dir / "screenshots"
-    if not screenshots_dir.exists():
-        return []
-
-    return sorted(screenshots_dir.glob(pattern))
-
-def analyze_screenshots(screenshots: List[Path], prompt: str, output_dir: Path):
-    """Analyze multiple screenshots with VLM."""
-    results = []
+def analyze_screenshots(screenshots: List[Path], prompt: str, output_dir: Path,
+                        jobs: int = DEFAULT_JOBS, max_edge: int = DEFAULT_MAX_EDGE,
+                        use_cache: bool = True, refresh: bool = False, per_file: bool = False):
+    """Analyze multiple screenshots with VLM.
+
+    Up to ``jobs`` requests are in flight at once. Results come back in
+    ``screenshots`` order regardless of completion order. Analyses are
+    written to ANALYSES_FILE in that order, or with ``per_file`` each worker
+    saves its own ``<stem>.vlm-analysis.txt`` (and any ANALYSES_FILE from an
+    earlier run is removed). Screenshots larger than ``max_edge`` are
+    downscaled before upload when Pillow is available. Unless ``use_cache`` is off,
+    results are read from and written to the shared VLM cache (the one
+    audit-add-vlm.py uses); ``refresh`` skips the read but still writes.
+
+    After CIRCUIT_BREAKER_FAILURES failures in a row the service is probed
+    up to CIRCUIT_BREAKER_PROBES times with exponential backoff; if no probe
+    succeeds, screenshots not yet sent fail with CIRCUIT_OPEN_ERROR. Cached results are still used.
+    """
+    results = [None] * len(screenshots)
     total = len(screenshots)
 
     print(f"\n🔍 Analyzing {total} screenshots with VLM...")
     print(f"📝 Using prompt: {prompt[:100]}...\n" if len(prompt) > 100 else f"📝 Using prompt: {prompt}\n")
 
-    for i, screenshot in enumerate(screenshots, 1):
-        print(f"[{i}/{total}] {screenshot.name}")
-
-        # Analyze with VLM
-        result = analyze_image_with_vlm(screenshot, prompt)
-
-        if result["success"]:
-            analysis = result["analysis"]
-            parsed = parse_json_from_response(analysis)
-
+    circuit_open = threading.Event()
+    # Cleared while the service is being probed so workers hold off sending
+    vlm_ready = threading.Event()
+    vlm_ready.set()
+
+    def call_vlm(screenshot: Path, data: Optional[bytes] = None) -> dict:
+        vlm_ready.wait()
+        if circuit_open.is_set():
+            return {"success": False, "error": CIRCUIT_OPEN_ERROR}
+        return analyze_image_with_vlm(screenshot, prompt, max_edge, data)
+
+    def run_vlm(screenshot: Path) -> Tuple[dict, bool]:
+        if not use_cache:
+            return call_vlm(screenshot), False
+        # One read serves both the cache key and the upload on a miss
+        data = screenshot.read_bytes()
+        key = vlm_cache_key(screenshot, prompt, max_edge, data)
+        if not refresh:
+            cached = load_cached_vlm_result(key)
+            if cached is not None:
+                return cached, True
+        result = call_vlm(screenshot, data)
+        store_cached_vlm_result(key, result)
+        return result, False
+
+    def analyze_one(screenshot: Path) -> Tuple[dict, bool]:
+        result, cached = run_vlm(screenshot)
+        if per_file and result["success"]:
             # Save individual analysis
             analysis_file = output_dir / f"{screenshot.stem}.vlm-analysis.txt"
-            analysis_file.write_text(analysis)
-
-            # Collect for summary
-            results.append({
-                "screenshot": screenshot.name,
-                "analysis": analysis,
-                "parsed": parsed,
-                "success": True
-            })
-
-            # Quick summary
-            if parsed and "issues" in parsed:
-                issue_count = len(parsed["issues"])
-                if issue_count > 0:
-                    print(f"   ⚠️  Found {issue_count} issue(s)")
-                else:
-                    print(f"   ✅ No issues")
-            else:
-                print(f"   ✅ Analysis complete")
-        else:
-            print(f"   ❌ Failed: {result['error']}")
-            results.append({
-                "screenshot": screenshot.name,
-                "error": result["error"],
-                "success": False
-            })
-
-        print()
+            analysis_file.write_text(result["analysis"])
+        return result, cached
+
+    consecutive_failures = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(analyze_one, s): index for index, s in enumerate(screenshots)}
+        for done, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            result, cached = future.result()
+            print(f"[{done}/{total}] {screenshots[index].name}{' (cached)' if cached else ''}")
+            results[index] = record_vlm_result(screenshots[index], result)
+
+            if result["success"]:
+                consecutive_failures = 0
+            elif not circuit_open.is_set():
+                consecutive_failures += 1
+                if consecutive_failures >= CIRCUIT_BREAKER_FAILURES:
+                    vlm_ready.clear()
+                    # Backoff grows only across failed probes in this trip
+                    for attempt in range(1, CIRCUIT_BREAKER_PROBES + 1):
+                        time.sleep(2 ** attempt)
+                        if check_vlm_health(force=True):
+                            consecutive_failures = 0
+                            break
+                    else:
+                        print("   ⛔ VLM service is down; skipping screenshots not yet sent")
+                        circuit_open.set()
+                    vlm_ready.set()
+            print()
+
+    if per_file:
+        # Don't leave an earlier run's analyses beside this run's files
+        (output_dir / ANALYSES_FILE).unlink(missing_ok=True)
+    else:
+        # One file for the run rather than an open/write/close per screenshot
+        with (output_dir / ANALYSES_FILE).open("wb") as f:
+            f.writelines(
+                json_dumps({"stem": screenshot.stem, "analysis": result["analysis"]}) + b"\n"
+                for screenshot, result in zip(screenshots, results) if result["success"]
+            )
+
+    if use_cache:
+        evict_vlm_cache()
 
     return results
 
 def generate_summary_report(results: List[dict], output_path: Path):
     """Generate a summary report of all VLM analyses."""
-    report = "="*80 + "\n"
-    report += "VLM Visual Analysis Summary\n"
-    report += "="*80 + "\n\n"
-
     total_issues = 0
     screens_with_issues = 0
     high_severity = 0
     medium_severity = 0
     low_severity = 0
 
+    # Tally raw severities in one pass, then bucket each distinct value once
+    severities = Counter()
     for result in results:
-        if not result["success"]:
-            continue
-
-        parsed = result.get("parsed")
-        if not parsed or "issues" not in parsed:
-            continue
-
-        issues = parsed["issues"]
+        issues = result.get("issues")
         if not issues:
             continue
 
         screens_with_issues += 1
         total_issues += len(issues)
 
-        # Count severity
-        for issue in issues:
-            severity = issue.get("severity", "").lower()
-            if "high" in severity:
-                high_severity += 1
-            elif "medium" in severity:
-                medium_severity += 1
-            elif "low" in severity:
-                low_severity += 1
-
-    # Summary stats
-    report += f"Screens analyzed: {len(results)}\n"
-    report += f"Screens with issues: {screens_with_issues}\n"
-    report += f"Total issues: {total_issues}\n"
-    report += f"  - High severity: {high_severity}\n"
-    report += f"  - Medium severity: {medium_severity}\n"
-    report += f"  - Low severity: {low_severity}\n"
-    report += "\n" + "-"*80 + "\n\n"
-
-    # Detailed issues by screen
-    report += "Issues by Screen:\n\n"
+        severities.update(issue.get("severity", "").lower() for issue in issues)
+
+    for severity, count in severities.items():
+        if "high" in severity:
+            high_severity += count
+        elif "medium" in severity:
+            medium_severity += count
+        elif "low" in severity:
+            low_severity += count
+
+    out = [
+        f"{BAR}\n",
+        "VLM Visual Analysis Summary\n",
+        f"{BAR}\n\n",
+        # Summary stats
+        f"Screens analyzed: {len(results)}\n",
+        f"Screens with issues: {screens_with_issues}\n",
+        f"Total issues: {total_issues}\n",
+        f"  - High severity: {high_severity}\n",
+        f"  - Medium severity: {medium_severity}\n",
+        f"  - Low severity: {low_severity}\n",
+        f"\n{DASH}\n\n",
+        # Detailed issues by screen
+        "Issues by Screen:\n\n",
+    ]
 
     for result in results:
         if not result["success"]:
-            report += f"❌ {result['screenshot']}: Analysis failed\n"
+            out.append(f"❌ {result['screenshot']}: Analysis failed\n")
             continue
 
-        parsed = result.get("parsed")
-        if not parsed or "issues" not in parsed:
-            report += f"✅ {result['screenshot']}: No structured issues found\n"
+        issues = result["issues"]
+        if issues is None:
+            out.append(f"✅ {result['screenshot']}: No structured issues found\n")
             continue
 
-        issues = parsed["issues"]
         if not issues:
-            report += f"✅ {result['screenshot']}: No issues\n"
+            out.append(f"✅ {result['screenshot']}: No issues\n")
             continue
 
-        report += f"⚠️  {result['screenshot']}: {len(issues)} issue(s)\n"
+        out.append(f"⚠️  {result['screenshot']}: {len(issues)} issue(s)\n")
         for i, issue in enumerate(issues, 1):
             location = issue.get("location", "Unknown")
             severity = issue.get("severity", "Unknown")
             description = issue.get("issue", "No description")
-            report += f"   {i}. [{severity}] {location}\n"
-            report += f"      {description}\n"
-        report += "\n"
+            out.append(f"   {i}. [{severity}] {location}\n")
+            out.append(f"      {description}\n")
+        out.append("\n")
 
-    report += "="*80 + "\n"
+    out.append(f"{BAR}\n")
+    report = "".join(out)
 
     # Save report
     output_path.write_text(report)
@@ -194,9 +270,19 @@ def main():
     parser.add_argument("audit_dir", nargs="?", type=Path, help="Path to audit run directory (default: latest)")
     parser.add_argument("--prompt", help=f"Custom analysis prompt (default: light mode check)")
     parser.add_argument("--screens", help="Screen name patterns to analyze (comma-separated, e.g. 'settings-*,memos-*')")
+    parser.add_argument("--limit", type=int, help="Analyze only the first N matching screenshots (by name)")
     parser.add_argument("--output-dir", type=Path, help="Output directory for analyses (default: same as screenshots)")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help=f"Concurrent VLM requests (default: {DEFAULT_JOBS})")
+    parser.add_argument("--max-edge", type=int, default=DEFAULT_MAX_EDGE,
+                        help=f"Downscale screenshots to this longest edge before upload; needs Pillow, 0 disables (default: {DEFAULT_MAX_EDGE})")
+    parser.add_argument("--no-cache", action="store_true", help=f"Don't read or write the VLM result cache ({VLM_CACHE_DIR})")
+    parser.add_argument("--refresh", action="store_true", help="Re-run every screenshot, replacing cached results")
+    parser.add_argument("--per-file", action="store_true",
+                        help=f"Save each analysis as <screen>.vlm-analysis.txt instead of one {ANALYSES_FILE}")
 
     args = parser.parse_args()
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
 
     # Check VLM health
     if not check_vlm_health():
@@ -224,15 +310,13 @@ def main():
     print(f"📁 Using audit run: {audit_dir.name}")
 
     # Get screenshots
-    pattern = "*.png"
     if args.screens:
         # User can specify patterns like "settings-*" or specific files
-        patterns = args.screens.split(",")
-        screenshots = []
-        for p in patterns:
-            screenshots.extend(get_screenshots(audit_dir, p.strip() + ".png" if not p.endswith(".png") else p.strip()))
+        patterns = [p.strip() for p in args.screens.split(",")]
+        screenshots = get_screenshots(audit_dir, [p if p.endswith(".png") else p + ".png" for p in patterns],
+                                      args.limit)
     else:
-        screenshots = get_screenshots(audit_dir, pattern)
+        screenshots = get_screenshots(audit_dir, limit=args.limit)
 
     if not screenshots:
         print(f"❌ No screenshots found in {audit_dir / 'screenshots'}")
@@ -248,7 +332,8 @@ def main():
     prompt = args.prompt or DEFAULT_PROMPT
 
     # Analyze
-    results = analyze_screenshots(screenshots, prompt, output_dir)
+    results = analyze_screenshots(screenshots, prompt, output_dir, args.jobs, args.max_edge,
+                                  use_cache=not args.no_cache, refresh=args.refresh, per_file=args.per_file)
 
     # Generate summary
     summary_path = output_dir / "summary.txt"
@@ -257,16 +342,20 @@ def main():
 
     # Save detailed JSON
     json_path = output_dir / "results.json"
-    json_path.write_text(json.dumps({
+    json_dump({
         "audit_dir": str(audit_dir),
         "prompt": prompt,
-        "results": results
-    }, indent=2))
+        # "issues" is just parsed["issues"] again
+        "results": [{k: v for k, v in r.items() if k != "issues"} for r in results]
+    }, json_path, indent=True)
 
     print(f"\n✅ Analysis complete!")
     print(f"📝 Summary: {summary_path}")
     print(f"💾 Detailed results: {json_path}")
-    print(f"📁 Individual analyses: {output_dir}/")
+    if args.per_file:
+        print(f"📁 Individual analyses: {output_dir}/")
+    else:
+        print(f"📁 Analyses: {output_dir / ANALYSES_FILE}")
 
 if __name__ == "__main__":
     main()
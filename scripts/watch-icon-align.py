@@ -1,41 +1,67 @@
 #!/usr/bin/env -S uv run
+# /// script
+# requires-python = ">=3.9"
+# dependencies = ["pillow"]
+# ///
 """
 Watch Icon Alignment Tool
 Usage: uv run watch-icon-align.py [center_x] [center_y] [dot_radius]
 
 Defaults: center_x=513, center_y=330, dot_radius=35
+
+The cropped tile for each center is kept in /tmp, so re-running with a new
+radius only redraws the overlay on the small tile.
 """
 
+import hashlib
 import subprocess
 import sys
 import os
 
+from PIL import Image, ImageDraw
+
 SOURCE = os.environ.get("TALKIE_WATCH_ICON_SOURCE", "input.png")
 OUTPUT = "/tmp/watch_crosshairs.png"
 SIZE = 390
 HALF = SIZE // 2
 
-def generate(center_x=513, center_y=330, dot_radius=35):
+def base_tile(center_x, center_y):
+    """The cropped SOURCE tile, cut again only when SOURCE changes."""
+    source_id = hashlib.sha1(os.path.abspath(SOURCE).encode()).hexdigest()[:8]
+    tile_path = f"/tmp/watch_base_{source_id}_{center_x}_{center_y}.png"
+
+    try:
+        if os.path.getmtime(tile_path) >= os.path.getmtime(SOURCE):
+            with Image.open(tile_path) as cached:
+                return cached.convert("RGBA")
+    except OSError:
+        pass
+
     crop_x = center_x - HALF
     crop_y = center_y - HALF
+    with Image.open(SOURCE) as source:
+        tile = source.crop((crop_x, crop_y, crop_x + SIZE, crop_y + SIZE)).convert("RGBA")
+    tile.save(tile_path, compress_level=1)
+    return tile
+
+def generate(center_x=513, center_y=330, dot_radius=35):
+    img = base_tile(center_x, center_y)
+    draw = ImageDraw.Draw(img)
 
-    # Build ImageMagick command
-    cmd = [
-        "magick", SOURCE,
-        "-crop", f"{SIZE}x{SIZE}+{crop_x}+{crop_y}", "+repage",
-        "-stroke", "yellow", "-strokewidth", "1",
+    lines = [
         # Center crosshairs
-        "-draw", f"line {HALF},0 {HALF},{SIZE}",
-        "-draw", f"line 0,{HALF} {SIZE},{HALF}",
+        ((HALF, 0), (HALF, SIZE)),
+        ((0, HALF), (SIZE, HALF)),
         # Boundary box
-        "-draw", f"line {HALF - dot_radius},0 {HALF - dot_radius},{SIZE}",
-        "-draw", f"line {HALF + dot_radius},0 {HALF + dot_radius},{SIZE}",
-        "-draw", f"line 0,{HALF - dot_radius} {SIZE},{HALF - dot_radius}",
-        "-draw", f"line 0,{HALF + dot_radius} {SIZE},{HALF + dot_radius}",
-        OUTPUT
+        ((HALF - dot_radius, 0), (HALF - dot_radius, SIZE)),
+        ((HALF + dot_radius, 0), (HALF + dot_radius, SIZE)),
+        ((0, HALF - dot_radius), (SIZE, HALF - dot_radius)),
+        ((0, HALF + dot_radius), (SIZE, HALF + dot_radius)),
     ]
+    for line in lines:
+        draw.line(line, fill="yellow", width=1)
 
-    subprocess.run(cmd, check=True)
+    img.save(OUTPUT)
     print(f"Generated: {OUTPUT}")
     print(f"Settings: X={center_x}, Y={center_y}, radius={dot_radius}")
 